@@ -0,0 +1,56 @@
+import asyncio
+import logging
+import threading
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+
+class BackgroundLoop:
+    """One asyncio event loop on a daemon thread, shared for the app's lifetime."""
+
+    def __init__(self, connection_limit=10, timeout=30, blocking_workers=4):
+        self.connection_limit = connection_limit
+        self.timeout = timeout
+        self.loop = asyncio.new_event_loop()
+        # Blocking extractor calls run here so they never stall the loop.
+        self.executor = ThreadPoolExecutor(max_workers=blocking_workers, thread_name_prefix="extract")
+        self._session = None
+        self._thread = threading.Thread(target=self._run, name="async-loop", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    async def get_session(self):
+        # Created lazily on the loop thread; aiohttp sessions are bound to their loop.
+        if self._session is None or self._session.closed:
+            import aiohttp
+            connector = aiohttp.TCPConnector(limit=self.connection_limit, ttl_dns_cache=300)
+            self._session = aiohttp.ClientSession(connector=connector,
+                                                  timeout=aiohttp.ClientTimeout(total=self.timeout))
+        return self._session
+
+    async def run_blocking(self, func, *args, **kwargs):
+        return await self.loop.run_in_executor(self.executor, functools.partial(func, *args, **kwargs))
+
+    def submit(self, coro):
+        """Schedule coro on the loop and return a concurrent.futures.Future for it."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    async def _close_session(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+
+    def close(self, timeout=2):
+        if not self.loop.is_running():
+            return
+        try:
+            self.submit(self._close_session()).result(timeout)
+        except Exception as e:
+            logging.warning(f"Failed to close HTTP session cleanly: {str(e)}")
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout)
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,95 @@
+import time
+import threading
+
+PRIORITY_INTERACTIVE = 'interactive'
+PRIORITY_BACKGROUND = 'background'
+PRIORITIES = (PRIORITY_INTERACTIVE, PRIORITY_BACKGROUND)
+
+# Longest single sleep, so rate changes and cancellation are picked up quickly.
+MAX_WAIT = 0.25
+
+
+class BandwidthScheduler:
+    """App-wide token bucket shared by every active download.
+
+    rate is the total cap in bytes per second (0 means unlimited). Each priority
+    class may additionally be held to a share of that total, and background
+    transfers always yield while an interactive one is waiting for tokens.
+    Bytes are paid for after they arrive: a transfer may overdraw the bucket
+    once and then waits until the debt has been refilled.
+    """
+
+    def __init__(self, rate=0, shares=None, burst_seconds=1.0):
+        self._cond = threading.Condition()
+        self.burst_seconds = burst_seconds
+        self.rate = 0
+        self.shares = {PRIORITY_INTERACTIVE: 1.0, PRIORITY_BACKGROUND: 0.5}
+        self.shares.update(shares or {})
+        self._tokens = 0.0
+        self._class_tokens = {priority: 0.0 for priority in PRIORITIES}
+        self._waiting = {priority: 0 for priority in PRIORITIES}
+        self._refilled_at = time.monotonic()
+        self.set_rate(rate)
+
+    def set_rate(self, rate):
+        with self._cond:
+            self._refill()
+            self.rate = max(0, int(rate or 0))
+            self._cap()
+            self._cond.notify_all()
+
+    def set_share(self, priority, share):
+        with self._cond:
+            self._refill()
+            self.shares[priority] = min(1.0, max(0.0, float(share)))
+            self._cap()
+            self._cond.notify_all()
+
+    def _class_rate(self, priority):
+        return self.rate * self.shares.get(priority, 1.0)
+
+    def _cap(self):
+        self._tokens = min(self._tokens, self.rate * self.burst_seconds)
+        for priority in PRIORITIES:
+            self._class_tokens[priority] = min(self._class_tokens[priority],
+                                               self._class_rate(priority) * self.burst_seconds)
+
+    def _refill(self):
+        now = time.monotonic()
+        elapsed = now - self._refilled_at
+        self._refilled_at = now
+        self._tokens += elapsed * self.rate
+        for priority in PRIORITIES:
+            self._class_tokens[priority] += elapsed * self._class_rate(priority)
+        self._cap()
+
+    def _wait_time(self, priority):
+        deficit = max(-self._tokens / self.rate, 0)
+        class_rate = self._class_rate(priority)
+        if class_rate > 0:
+            deficit = max(deficit, -self._class_tokens[priority] / class_rate)
+        else:
+            deficit = MAX_WAIT
+        return min(max(deficit, 0.005), MAX_WAIT)
+
+    def consume(self, nbytes, priority=PRIORITY_INTERACTIVE, stop_event=None):
+        """Account for nbytes just received, blocking while the caller is over its budget."""
+        if nbytes <= 0:
+            return
+        priority = priority if priority in PRIORITIES else PRIORITY_INTERACTIVE
+        with self._cond:
+            self._waiting[priority] += 1
+            try:
+                while self.rate > 0:
+                    self._refill()
+                    yields = priority != PRIORITY_INTERACTIVE and self._waiting[PRIORITY_INTERACTIVE] > 0
+                    if not yields and self._tokens >= 0 and self._class_tokens[priority] >= 0:
+                        self._tokens -= nbytes
+                        self._class_tokens[priority] -= nbytes
+                        return
+                    self._cond.wait(self._wait_time(priority))
+                    if stop_event is not None and stop_event.is_set():
+                        return
+            finally:
+                self._waiting[priority] -= 1
+                self._cond.notify_all()
@@ -0,0 +1,152 @@
+import io
+import json
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+RANGE_REGEX = re.compile(r'bytes=(\d+)-(\d*)')
+
+
+def synthetic_bytes(size, seed=0):
+    """Deterministic, incompressible-looking payload of the given size."""
+    block = bytes((i * 131 + seed * 17) % 251 for i in range(65536))
+    return (block * (size // len(block) + 1))[:size]
+
+
+def synthetic_jpeg(width=1280, height=720):
+    from PIL import Image
+    buffer = io.BytesIO()
+    Image.new('RGB', (width, height), (200, 30, 30)).save(buffer, 'JPEG', quality=85)
+    return buffer.getvalue()
+
+
+class QuietHTTPServer(ThreadingHTTPServer):
+    def handle_error(self, request, client_address):
+        # Canceled downloads drop their connection mid-transfer; that is expected here.
+        pass
+
+
+class MediaServer:
+    """Local stand-in for a video site: progressive files, HLS playlists, thumbnails and metadata.
+
+    Routes:
+        /progressive.mp4            single-file media, Range requests supported
+        /audio.webm                 audio-only single file, Range requests supported
+        /hls/index.m3u8, /hls/N.ts  fragmented media
+        /thumb.jpg                  1280x720 JPEG thumbnail
+        /api/<video_id>.json        extractor metadata for /watch/<video_id>
+    """
+
+    def __init__(self, progressive_size=32 * 1024 * 1024, segment_count=64, segment_size=256 * 1024):
+        self.progressive = synthetic_bytes(progressive_size)
+        self.audio = synthetic_bytes(progressive_size // 8, seed=2)
+        self.segment = synthetic_bytes(segment_size, seed=1)
+        self.segment_count = segment_count
+        self.thumbnail = synthetic_jpeg()
+        self._server = QuietHTTPServer(('127.0.0.1', 0), self._handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, name="media-server", daemon=True)
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def playlist(self):
+        lines = ['#EXTM3U', '#EXT-X-VERSION:3', '#EXT-X-TARGETDURATION:2', '#EXT-X-MEDIA-SEQUENCE:0']
+        for index in range(self.segment_count):
+            lines += ['#EXTINF:2.0,', f'{index}.ts']
+        lines.append('#EXT-X-ENDLIST')
+        return ('\n'.join(lines) + '\n').encode('utf-8')
+
+    def info(self, video_id):
+        """Metadata in the shape an extractor returns before format selection."""
+        formats = [{
+            'format_id': 'progressive',
+            'url': f'{self.base_url}/progressive.mp4',
+            'ext': 'mp4',
+            'vcodec': 'avc1.64001F',
+            'acodec': 'mp4a.40.2',
+            'height': 720,
+            'filesize': len(self.progressive),
+        }, {
+            'format_id': 'audio',
+            'url': f'{self.base_url}/audio.webm',
+            'ext': 'webm',
+            'vcodec': 'none',
+            'acodec': 'opus',
+            'abr': 128,
+            'filesize': len(self.audio),
+        }] if video_id == 'progressive' else [{
+            'format_id': 'hls',
+            'url': f'{self.base_url}/hls/index.m3u8',
+            # Segments are not real MPEG-TS; yt-dlp's HLS fixup only rewrites mp4/m4a output.
+            'ext': 'ts',
+            'protocol': 'm3u8_native',
+            'vcodec': 'avc1.64001F',
+            'acodec': 'mp4a.40.2',
+            'height': 720,
+        }]
+        return {
+            'id': video_id,
+            'title': f'bench {video_id}',
+            'thumbnail': f'{self.base_url}/thumb.jpg',
+            'formats': formats,
+        }
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                path = self.path.split('?', 1)[0]
+                if path == '/progressive.mp4':
+                    self._send_ranged(server.progressive, 'video/mp4')
+                elif path == '/audio.webm':
+                    self._send_ranged(server.audio, 'audio/webm')
+                elif path == '/hls/index.m3u8':
+                    self._send(server.playlist(), 'application/vnd.apple.mpegurl')
+                elif path.startswith('/hls/') and path.endswith('.ts'):
+                    self._send(server.segment, 'video/mp2t')
+                elif path == '/thumb.jpg':
+                    self._send(server.thumbnail, 'image/jpeg')
+                elif path.startswith('/api/') and path.endswith('.json'):
+                    video_id = path[len('/api/'):-len('.json')]
+                    self._send(json.dumps(server.info(video_id)).encode('utf-8'), 'application/json')
+                else:
+                    self.send_error(404)
+
+            def _send(self, body, content_type, status=200, headers=None):
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _send_ranged(self, body, content_type):
+                match = RANGE_REGEX.match(self.headers.get('Range', ''))
+                if not match:
+                    self._send(body, content_type, headers={'Accept-Ranges': 'bytes'})
+                    return
+                start = int(match.group(1))
+                end = int(match.group(2)) if match.group(2) else len(body) - 1
+                end = min(end, len(body) - 1)
+                self._send(body[start:end + 1], content_type, status=206, headers={
+                    'Accept-Ranges': 'bytes',
+                    'Content-Range': f'bytes {start}-{end}/{len(body)}',
+                })
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
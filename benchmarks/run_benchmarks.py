@@ -0,0 +1,305 @@
+"""Offline benchmarks for the download pipeline.
+
+Run from the repository root:
+
+    python -m benchmarks.run_benchmarks --output bench_results.json
+
+Everything is served by a local MediaServer, so no network access is needed.
+Downloads go through DownloadManager.download_content and ydl_hook exactly as
+in the app; only extraction is replaced by a stub extractor for the local server.
+"""
+import os
+import sys
+import json
+import math
+import time
+import wave
+import shutil
+import struct
+import logging
+import argparse
+import platform
+import statistics
+import tempfile
+import subprocess
+
+import yt_dlp
+from yt_dlp.extractor.common import InfoExtractor
+
+from async_runtime import BackgroundLoop
+from download_manager import DownloadJob, DownloadManager, ProgressSnapshot
+from job_dashboard import JobTable
+from thumbnail_cache import decode_thumbnail
+from transcode_pool import transcode_audio
+from benchmarks.media_server import MediaServer
+
+# download_content only accepts YouTube/Facebook URLs; the matching extraction result
+# is seeded into the manager's info store, so these are never fetched.
+BENCH_VIDEO_URLS = {
+    'progressive': 'https://www.youtube.com/watch?v=benchprog01',
+    'hls': 'https://www.youtube.com/watch?v=benchhls001',
+}
+
+
+class BenchIE(InfoExtractor):
+    """Extractor for the local media server: one metadata request per video, like a real site."""
+    IE_NAME = 'bench'
+    _VALID_URL = r'http://127\.0\.0\.1:\d+/watch/(?P<id>[\w-]+)'
+
+    def _real_extract(self, url):
+        video_id = self._match_id(url)
+        base_url = url.split('/watch/', 1)[0]
+        return self._download_json(f'{base_url}/api/{video_id}.json', video_id)
+
+
+class BenchSettings:
+    """The subset of SettingsManager the download manager reads."""
+
+    def __init__(self, ffmpeg_path):
+        self.ffmpeg_path = ffmpeg_path
+        self.ffprobe_path = shutil.which('ffprobe') or ffmpeg_path
+        self.max_concurrent_downloads = 1
+        self.min_fragment_concurrency = 1
+        self.max_fragment_concurrency = 8
+        self.bandwidth_limit_kbps = 0
+        self.background_bandwidth_share = 0.5
+        self.staging_dir = ''
+        self.min_free_space_mb = 0
+        self.max_retries = 0
+        self.retry_base_delay = 2.0
+        self.retry_max_delay = 120
+        self.circuit_failure_threshold = 5
+        self.circuit_cooldown_seconds = 60
+
+
+def stub_extract_info(url):
+    """extraction.extract_info, but with only the bench extractor registered."""
+    with yt_dlp.YoutubeDL({'quiet': True, 'skip_download': True}, auto_init=False) as ydl:
+        ydl.add_info_extractor(BenchIE())
+        info = ydl.extract_info(url, download=False, process=False)
+        info['_extracted_at'] = time.time()
+        return info
+
+
+def summarize(samples, scale=1.0):
+    ordered = sorted(samples)
+    return {
+        'count': len(ordered),
+        'mean': statistics.fmean(ordered) * scale,
+        'p50': ordered[len(ordered) // 2] * scale,
+        'p95': ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * scale,
+        'max': ordered[-1] * scale,
+    }
+
+
+def bench_preview(server, iterations):
+    """Extraction plus thumbnail fetch and decode, as the preview pane does it."""
+    loop = BackgroundLoop()
+    loop.start()
+
+    async def fetch_preview(url):
+        info = await loop.run_blocking(stub_extract_info, url)
+        session = await loop.get_session()
+        async with session.get(info['thumbnail']) as response:
+            data = await response.read()
+        await loop.run_blocking(decode_thumbnail, data)
+
+    samples = []
+    try:
+        for _ in range(iterations):
+            started = time.perf_counter()
+            loop.submit(fetch_preview(f'{server.base_url}/watch/progressive')).result()
+            samples.append(time.perf_counter() - started)
+    finally:
+        loop.close()
+    return {'latency_ms': summarize(samples, 1000)}
+
+
+def bench_download(server, settings, kind, iterations, parallel_fragments, download_type='video', stream_audio=False):
+    manager = DownloadManager(settings, max_workers=1)
+    url = BENCH_VIDEO_URLS[kind]
+    info = stub_extract_info(f'{server.base_url}/watch/{kind}')
+    samples, total_bytes = [], 0
+    try:
+        for _ in range(iterations):
+            with tempfile.TemporaryDirectory(prefix='ytd-bench-') as save_path:
+                # Seeded per run: the store hands out copies, but keep each run's extraction fresh.
+                manager.info_store.put(url, info)
+                job = DownloadJob(url, download_type, {
+                    'audio_quality': '192', 'video_quality': '1080', 'audio_format': 'mp3',
+                    'save_path': save_path, 'parallel_fragments': parallel_fragments, 'stream_audio': stream_audio,
+                })
+                manager.jobs[job.id] = job
+                started = time.perf_counter()
+                manager.download_content(job)
+                # Non-streamed audio finishes in the transcode pool.
+                while job.state == 'postprocessing':
+                    time.sleep(0.01)
+                samples.append(time.perf_counter() - started)
+                if job.state != 'complete':
+                    raise RuntimeError(f"{kind} download ended as {job.state}: {job.error}")
+                total_bytes = os.path.getsize(job.output_path)
+    finally:
+        manager.shutdown()
+    mean_seconds = statistics.fmean(samples)
+    return {
+        'bytes': total_bytes,
+        'download_type': download_type,
+        'stream_audio': stream_audio,
+        'parallel_fragments': parallel_fragments,
+        'seconds': summarize(samples),
+        'throughput_mib_s': total_bytes / mean_seconds / (1024 * 1024),
+        'phases': manager.metrics.snapshot()['phases'],
+    }
+
+
+def bench_progress(settings, calls):
+    """Cost of one progress callback in ydl_hook, and of the UI reading the latest snapshot."""
+    manager = DownloadManager(settings, max_workers=1)
+    job = DownloadJob(BENCH_VIDEO_URLS['progressive'], 'video', {})
+    total = calls * 1024
+    started = time.perf_counter()
+    for index in range(calls):
+        manager.ydl_hook(job, {
+            'status': 'downloading', 'filename': 'bench.mp4', 'downloaded_bytes': index * 1024,
+            'total_bytes': total, 'speed': 1024.0 * 1024, 'elapsed': index / 1000,
+            'info_dict': {},
+        })
+    hook_seconds = time.perf_counter() - started
+
+    last_seen, changes = None, 0
+    started = time.perf_counter()
+    for _ in range(calls):
+        snapshot = job.progress
+        if snapshot is not last_seen:
+            last_seen = snapshot
+            changes += 1
+    read_seconds = time.perf_counter() - started
+    manager.shutdown()
+    return {
+        'calls': calls,
+        'hook_us_per_call': hook_seconds / calls * 1e6,
+        'snapshot_read_us_per_call': read_seconds / calls * 1e6,
+    }
+
+
+def bench_dashboard(job_count, frames, budget=0.008):
+    """Per-frame cost of the dashboard model with a large playlist queued and a few downloads running."""
+    parent = DownloadJob('https://www.youtube.com/playlist?list=PLbench', 'video', {})
+    parent.state = 'complete'
+    jobs = {parent.id: parent}
+    for index in range(job_count):
+        job = DownloadJob(f'https://www.youtube.com/watch?v=b{index:010d}', 'video', {}, parent_id=parent.id)
+        jobs[job.id] = job
+        parent.children.append(job.id)
+    entries = [jobs[job_id] for job_id in parent.children]
+    table = JobTable(jobs.get)
+    table.add([parent])
+    samples = []
+    for frame in range(frames):
+        # Three downloads report progress every frame and one finishes every ten frames.
+        for job in entries[frame // 10:frame // 10 + 3]:
+            job.state = 'running'
+            job.progress = ProgressSnapshot(frame % 100, 1024.0 * 1024, 10, frame * 1024, 100 * 1024)
+        entries[frame // 10].state = 'complete'
+        started = time.perf_counter()
+        table.update(budget)
+        table.order()
+        samples.append(time.perf_counter() - started)
+    return {'jobs': job_count + 1, 'frame_budget_ms': budget * 1000, 'frame_ms': summarize(samples, 1000)}
+
+
+def write_tone(path, seconds, rate=44100):
+    with wave.open(path, 'wb') as f:
+        f.setnchannels(2)
+        f.setsampwidth(2)
+        f.setframerate(rate)
+        frame = bytearray()
+        for index in range(rate):
+            sample = int(12000 * math.sin(2 * math.pi * 440 * index / rate))
+            frame += struct.pack('<hh', sample, sample)
+        for _ in range(seconds):
+            f.writeframes(frame)
+
+
+def bench_postprocess(ffmpeg_path, iterations, seconds=60):
+    """Audio conversion as the transcode pool runs it; skipped when FFmpeg is not installed."""
+    if not ffmpeg_path:
+        return {'skipped': 'ffmpeg not found'}
+    samples = []
+    with tempfile.TemporaryDirectory(prefix='ytd-bench-') as work_dir:
+        for index in range(iterations):
+            source = os.path.join(work_dir, f'tone{index}.wav')
+            write_tone(source, seconds)
+            started = time.perf_counter()
+            transcode_audio(ffmpeg_path, source, 'mp3', '192')
+            samples.append(time.perf_counter() - started)
+    return {'audio_seconds': seconds, 'codec': 'mp3', 'seconds': summarize(samples)}
+
+
+def bench_startup(iterations):
+    """Import cost of the GUI module and, when a display is available, time to interactive."""
+    code = "import time; t = time.perf_counter(); import youtube_downloader; print(time.perf_counter() - t)"
+    samples = []
+    for _ in range(iterations):
+        result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+        samples.append(float(result.stdout.strip().splitlines()[-1]))
+    results = {'import_ms': summarize(samples, 1000)}
+    if os.environ.get('DISPLAY'):
+        samples = []
+        for _ in range(iterations):
+            result = subprocess.run([sys.executable, 'main.py', '--measure-startup'],
+                                    capture_output=True, text=True, check=True)
+            line = next(l for l in result.stdout.splitlines() if l.startswith('time_to_interactive_ms='))
+            samples.append(float(line.split('=', 1)[1]))
+        results['time_to_interactive_ms'] = summarize(samples)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline download pipeline benchmarks")
+    parser.add_argument('--iterations', type=int, default=5)
+    parser.add_argument('--size-mb', type=int, default=32, help="size of the progressive file")
+    parser.add_argument('--segments', type=int, default=64, help="number of 256 KiB HLS segments")
+    parser.add_argument('--progress-calls', type=int, default=100000)
+    parser.add_argument('--dashboard-jobs', type=int, default=5000)
+    parser.add_argument('--output', help="write the JSON results here instead of stdout")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+    ffmpeg_path = shutil.which('ffmpeg')
+    # The pre-download check only needs an executable; FFmpeg itself is used by post-processing alone.
+    settings = BenchSettings(ffmpeg_path or sys.executable)
+    server = MediaServer(progressive_size=args.size_mb * 1024 * 1024, segment_count=args.segments).start()
+    try:
+        results = {
+            'timestamp': time.time(),
+            'python': platform.python_version(),
+            'yt_dlp': yt_dlp.version.__version__,
+            'platform': platform.platform(),
+            'startup': bench_startup(args.iterations),
+            'preview': bench_preview(server, args.iterations),
+            'download_progressive': bench_download(server, settings, 'progressive', args.iterations, False),
+            'download_hls': bench_download(server, settings, 'hls', args.iterations, False),
+            'download_hls_parallel': bench_download(server, settings, 'hls', args.iterations, True),
+            'download_audio_file': bench_download(server, settings, 'progressive', args.iterations, False, 'audio')
+            if ffmpeg_path else {'skipped': 'ffmpeg not found'},
+            'download_audio_stream': bench_download(server, settings, 'progressive', args.iterations, False, 'audio', True)
+            if ffmpeg_path else {'skipped': 'ffmpeg not found'},
+            'progress': bench_progress(settings, args.progress_calls),
+            'dashboard': bench_dashboard(args.dashboard_jobs, 200),
+            'postprocess': bench_postprocess(ffmpeg_path, args.iterations),
+        }
+    finally:
+        server.stop()
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output)
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
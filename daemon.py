@@ -0,0 +1,326 @@
+import os
+import json
+import time
+import logging
+import socketserver
+import threading
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from settings_manager import SettingsManager
+from download_manager import DownloadManager, ProgressSnapshot, default_options, FINISHED_STATES
+from job_journal import JobJournal
+from download_archive import DownloadArchive
+from extraction import extract_info, get_thumbnail_url
+from utils import auto_detect_ffmpeg, is_valid_executable, collect_video_urls, is_collection_url
+
+DOWNLOAD_TYPES = ('audio', 'video')
+# Options a client may set per request; everything else comes from the daemon's settings.
+CLIENT_OPTIONS = ('format', 'audio_quality', 'video_quality', 'audio_format', 'save_path', 'priority')
+EVENT_INTERVAL = 0.25
+KEEPALIVE_INTERVAL = 15
+
+
+def serve(port=None, socket_path=None):
+    service = DownloadService()
+    service.start(port if port is not None else service.settings_manager.daemon_port, socket_path)
+    service.wait()
+
+
+def job_to_dict(job):
+    progress = job.progress
+    return {
+        'id': job.id,
+        'url': job.url,
+        'download_type': job.download_type,
+        'parent_id': job.parent_id,
+        'children': list(job.children),
+        'state': job.state,
+        'error': job.error,
+        'output_path': job.output_path,
+        'progress': progress._asdict() if progress else None,
+    }
+
+
+class DownloadService:
+    """The download engine as a long-running local service shared by every client.
+
+    One process keeps the worker pool, warm yt-dlp instances, preview results and
+    the journal/archive; clients submit and watch jobs over HTTP (TCP on localhost
+    or a Unix socket).
+
+        POST   /jobs          {"urls": [...], "type": "audio"|"video", "options": {...}}
+        GET    /jobs          all jobs
+        GET    /jobs/<id>     one job
+        DELETE /jobs/<id>     cancel a job (and a playlist's entries)
+        GET    /events        server-sent events, one "job" event per changed job
+        POST   /preview       {"url": ...} -> title and thumbnail; later downloads reuse the extraction
+        GET    /health
+    """
+
+    def __init__(self, settings_manager=None, download_manager=None):
+        self.settings_manager = settings_manager or SettingsManager()
+        if not (is_valid_executable(self.settings_manager.ffmpeg_path)
+                and is_valid_executable(self.settings_manager.ffprobe_path)):
+            auto_detect_ffmpeg(self.settings_manager)
+        self.download_manager = download_manager or DownloadManager(
+            self.settings_manager, journal=JobJournal(), archive=DownloadArchive())
+        self._servers = []
+        self._stopping = threading.Event()
+
+    def start(self, port=None, socket_path=None):
+        manager = self.download_manager
+        manager.start()
+        manager.metrics.start_exporter(self.settings_manager.metrics_port, self.settings_manager.metrics_file)
+        # Without FFmpeg every resumed job would fail its checks and be journaled as an error for good.
+        if (is_valid_executable(self.settings_manager.ffmpeg_path)
+                and is_valid_executable(self.settings_manager.ffprobe_path)):
+            manager.resume_unfinished()
+        else:
+            logging.error("FFmpeg/FFprobe not found: unfinished jobs are left in the journal until they are configured")
+        threading.Thread(target=manager.warm_up, args=(('128', '192', '320'), ('720', '1080', '1440', '2160')),
+                         name="ydl-warm-up", daemon=True).start()
+        handler = _handler_for(self)
+        if port is not None:
+            self._serve(ThreadingHTTPServer(('127.0.0.1', port), handler))
+            logging.info(f"Download service listening on http://127.0.0.1:{port}")
+        if socket_path:
+            if os.path.exists(socket_path):
+                os.remove(socket_path)
+            # Not available on Windows; there the TCP listener is the only option.
+            self._serve(socketserver.ThreadingUnixStreamServer(socket_path, handler))
+            logging.info(f"Download service listening on {socket_path}")
+
+    def _serve(self, server):
+        server.daemon_threads = True
+        self._servers.append(server)
+        threading.Thread(target=server.serve_forever, name="daemon-http", daemon=True).start()
+
+    def wait(self):
+        try:
+            while not self._stopping.wait(1):
+                pass
+        except KeyboardInterrupt:
+            pass
+        self.shutdown()
+
+    def shutdown(self):
+        self._stopping.set()
+        for server in self._servers:
+            server.shutdown()
+            server.server_close()
+        self._servers = []
+        manager = self.download_manager
+        manager.shutdown()
+        manager.metrics.stop_exporter()
+        if self.settings_manager.metrics_file:
+            manager.metrics.dump(self.settings_manager.metrics_file)
+        self.settings_manager.flush()
+
+    def submit(self, payload):
+        download_type = payload.get('type')
+        if download_type not in DOWNLOAD_TYPES:
+            raise ValueError(f"type must be one of {', '.join(DOWNLOAD_TYPES)}")
+        urls = payload.get('urls') or ([payload['url']] if payload.get('url') else [])
+        batch = collect_video_urls(urls)
+        if not batch.urls:
+            raise ValueError("No valid YouTube or Facebook URLs given")
+        options = default_options(self.settings_manager)
+        options.update({k: str(v) for k, v in (payload.get('options') or {}).items() if k in CLIENT_OPTIONS})
+        jobs = self.download_manager.submit_many(batch.urls, download_type, options)
+        return {'jobs': [job_to_dict(job) for job in jobs], 'duplicates': batch.duplicates, 'invalid': batch.invalid}
+
+    def preview(self, url):
+        manager = self.download_manager
+        info = extract_info(url, manager.ydl_pool)
+        manager.info_store.put(url, info)
+        return {'url': url, 'title': info.get('title'), 'thumbnail': get_thumbnail_url(info)}
+
+    def stream_events(self, write):
+        """Send every job whose state or progress changed, sampled like the GUI samples snapshots."""
+        sent = {}
+        last_write = time.monotonic()
+        while not self._stopping.is_set():
+            for job in list(self.download_manager.jobs.values()):
+                marker = (job.state, job.progress)
+                if sent.get(job.id) != marker:
+                    sent[job.id] = marker
+                    write(f"event: job\ndata: {json.dumps(job_to_dict(job))}\n\n")
+                    last_write = time.monotonic()
+            if time.monotonic() - last_write >= KEEPALIVE_INTERVAL:
+                write(": keepalive\n\n")
+                last_write = time.monotonic()
+            time.sleep(EVENT_INTERVAL)
+
+
+def _handler_for(service):
+    class DaemonHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path == '/health':
+                self._send_json(200, {'status': 'ok', 'active_jobs': len(service.download_manager.active_jobs())})
+            elif self.path == '/jobs':
+                self._send_json(200, [job_to_dict(job) for job in list(service.download_manager.jobs.values())])
+            elif self.path.startswith('/jobs/'):
+                job = self._job()
+                if job:
+                    self._send_json(200, job_to_dict(job))
+            elif self.path == '/events':
+                self._stream_events()
+            else:
+                self._send_json(404, {'error': 'Not found'})
+
+        def do_POST(self):
+            try:
+                length = int(self.headers.get('Content-Length') or 0)
+                payload = json.loads(self.rfile.read(length) or b'{}')
+                if self.path == '/jobs':
+                    self._send_json(201, service.submit(payload))
+                elif self.path == '/preview':
+                    self._send_json(200, service.preview(payload['url']))
+                else:
+                    self._send_json(404, {'error': 'Not found'})
+            except (ValueError, KeyError, TypeError) as e:
+                self._send_json(400, {'error': str(e)})
+            except Exception as e:
+                logging.error(f"Error handling {self.path}: {str(e)}")
+                self._send_json(500, {'error': str(e)})
+
+        def do_DELETE(self):
+            job = self._job()
+            if job:
+                service.download_manager.cancel(job.id)
+                self._send_json(202, job_to_dict(job))
+
+        def _job(self):
+            job_id = self.path[len('/jobs/'):]
+            job = service.download_manager.jobs.get(int(job_id)) if job_id.isdigit() else None
+            if job is None:
+                self._send_json(404, {'error': f"No job {job_id}"})
+            return job
+
+        def _stream_events(self):
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/event-stream')
+            self.send_header('Cache-Control', 'no-cache')
+            self.end_headers()
+
+            def write(text):
+                self.wfile.write(text.encode('utf-8'))
+                self.wfile.flush()
+
+            try:
+                service.stream_events(write)
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+        def _send_json(self, status, body):
+            payload = json.dumps(body).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def address_string(self):
+            # Unix socket peers have no host/port.
+            return self.client_address[0] if isinstance(self.client_address, tuple) else 'unix'
+
+        def log_message(self, format, *args):
+            logging.debug(f"{self.address_string()} {format % args}")
+
+    return DaemonHandler
+
+
+class RemoteJob:
+    """Client-side view of a daemon job, with the attributes the GUI reads from DownloadJob."""
+
+    def __init__(self, data):
+        self.update(data)
+
+    def update(self, data):
+        self.id = data['id']
+        self.url = data['url']
+        self.download_type = data['download_type']
+        self.parent_id = data['parent_id']
+        self.children = data['children']
+        self.state = data['state']
+        self.error = data['error']
+        self.output_path = data['output_path']
+        self.progress = ProgressSnapshot(**data['progress']) if data['progress'] else None
+
+    @property
+    def is_finished(self):
+        return self.state in FINISHED_STATES
+
+    @property
+    def is_collection(self):
+        return is_collection_url(self.url)
+
+
+class DaemonClient:
+    """Submits jobs to a running DownloadService and mirrors their state from its event stream."""
+
+    def __init__(self, base_url, timeout=10):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.jobs = {}
+        self._closed = threading.Event()
+        threading.Thread(target=self._follow_events, name="daemon-events", daemon=True).start()
+
+    def _request(self, method, path, body=None):
+        data = json.dumps(body).encode('utf-8') if body is not None else None
+        request = urllib.request.Request(self.base_url + path, data=data, method=method,
+                                         headers={'Content-Type': 'application/json'})
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            raise RuntimeError(json.loads(e.read() or b'{}').get('error') or str(e))
+
+    def _track(self, data):
+        job = self.jobs.get(data['id'])
+        if job:
+            job.update(data)
+        else:
+            job = self.jobs[data['id']] = RemoteJob(data)
+        return job
+
+    def is_available(self):
+        try:
+            return self._request('GET', '/health')['status'] == 'ok'
+        except (OSError, RuntimeError, ValueError):
+            return False
+
+    def submit_many(self, urls, download_type, options):
+        result = self._request('POST', '/jobs', {'urls': urls, 'type': download_type, 'options': options})
+        return [self._track(data) for data in result['jobs']]
+
+    def preview(self, url):
+        return self._request('POST', '/preview', {'url': url})
+
+    def cancel(self, job_id):
+        self._track(self._request('DELETE', f'/jobs/{job_id}'))
+
+    def cancel_all(self):
+        for job in list(self.jobs.values()):
+            if not job.is_finished:
+                self.cancel(job.id)
+
+    def active_jobs(self):
+        return [job for job in list(self.jobs.values()) if not job.is_finished]
+
+    def _follow_events(self):
+        while not self._closed.is_set():
+            try:
+                with urllib.request.urlopen(self.base_url + '/events') as response:
+                    for line in response:
+                        if self._closed.is_set():
+                            return
+                        if line.startswith(b'data: '):
+                            self._track(json.loads(line[len('data: '):]))
+            except (OSError, ValueError) as e:
+                logging.warning(f"Lost the download service event stream: {str(e)}")
+            self._closed.wait(2)
+
+    def close(self):
+        self._closed.set()
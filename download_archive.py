@@ -0,0 +1,146 @@
+import os
+import re
+import json
+import time
+import logging
+import sqlite3
+import threading
+from utils import get_video_key
+from transcode_pool import audio_extension
+
+# Downloads are saved under this yt-dlp template, so rebuild() can recover the video ID from the file name.
+FILENAME_TEMPLATE = '%(title)s [%(id)s].%(ext)s'
+# YouTube IDs are 11 characters; Facebook video IDs are longer and all digits.
+FILENAME_ID_REGEX = re.compile(r'\[(?:(?P<youtube>[A-Za-z0-9_-]{11})|(?P<facebook>\d{12,}))\]')
+AUDIO_EXTENSIONS = ('mp3', 'aac', 'm4a', 'wav', 'flac', 'opus', 'ogg')
+VIDEO_EXTENSIONS = ('mp4', 'mkv', 'webm', 'avi', 'mov', 'flv', '3gp')
+# Files yt-dlp leaves behind while a download is unfinished: single formats before
+# merging (Title [id].f137.mp4) and merge or transcode temp files (Title [id].temp.mp4).
+UNFINISHED_FILE_REGEX = re.compile(r'\.(?:temp|partial|f\d+)\.[^.]+$', re.IGNORECASE)
+
+
+def archive_variant(download_type, options):
+    """Describe what was downloaded, so a video and its mp3 are tracked separately.
+
+    Only what decides the output file counts: audio is keyed on the extension
+    the codec is written with (aac ends up as .m4a), video on its quality alone,
+    since the container is whatever yt-dlp merges the best streams into.
+    """
+    if download_type == 'audio':
+        return f"audio:{audio_extension(options.get('audio_format'))}:{options.get('audio_quality')}"
+    return f"video:{options.get('video_quality')}"
+
+
+def _file_variant(ext):
+    """Variant of a file found on disk, or None if it is not a download."""
+    if ext in AUDIO_EXTENSIONS:
+        return f"audio:{ext}:*"
+    if ext in VIDEO_EXTENSIONS:
+        return "video:*"
+    return None
+
+
+def _any_quality(variant):
+    return variant.rsplit(':', 1)[0] + ':*'
+
+
+class DownloadArchive:
+    """Index of finished downloads keyed by canonical video ID and variant.
+
+    Lookups hit the primary key only, so they stay fast with hundreds of
+    thousands of entries and can run before any network work.
+    """
+
+    ARCHIVE_FILE = "archive.db"
+
+    def __init__(self, path=None):
+        self.path = path or self.ARCHIVE_FILE
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS archive (
+                video_key TEXT NOT NULL,
+                variant TEXT NOT NULL,
+                output_path TEXT,
+                completed_at REAL NOT NULL,
+                PRIMARY KEY (video_key, variant)
+            ) WITHOUT ROWID
+        """)
+        self._conn.commit()
+
+    def contains(self, video_key, variant):
+        # Entries recovered from file names alone don't know the quality; they match any.
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM archive WHERE video_key = ? AND variant IN (?, ?) LIMIT 1",
+                (video_key, variant, _any_quality(variant))).fetchone()
+        return row is not None
+
+    def add(self, video_key, variant, output_path=None):
+        self.add_many([(video_key, variant, output_path)])
+
+    def add_many(self, entries):
+        now = time.time()
+        with self._lock:
+            try:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO archive (video_key, variant, output_path, completed_at) VALUES (?, ?, ?, ?)",
+                    [(video_key, variant, output_path, now) for video_key, variant, output_path in entries])
+                self._conn.commit()
+            except sqlite3.Error as e:
+                logging.error(f"Download archive error: {str(e)}")
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM archive").fetchone()[0]
+
+    def rebuild(self, directory, journal=None):
+        """Index the finished downloads found in directory; returns the number of entries added."""
+        directory = os.path.abspath(directory)
+        entries = []
+        if journal:
+            for row in journal.completed():
+                path = row['output_path']
+                video_key = get_video_key(row['url'])
+                if video_key and path and os.path.abspath(path).startswith(directory) and os.path.exists(path):
+                    entries.append((video_key, archive_variant(row['download_type'], row['options']), path))
+
+        for dirpath, _, filenames in os.walk(directory):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                if filename.endswith('.info.json'):
+                    entry = self._entry_from_info_json(path)
+                    if entry:
+                        entries.append(entry)
+                    continue
+                if UNFINISHED_FILE_REGEX.search(filename):
+                    continue
+                variant = _file_variant(filename.rsplit('.', 1)[-1].lower())
+                match = FILENAME_ID_REGEX.search(filename)
+                if variant and match:
+                    site = 'youtube' if match.group('youtube') else 'facebook'
+                    entries.append((f"{site}:{match.group(site)}", variant, path))
+
+        self.add_many(entries)
+        logging.info(f"Indexed {len(entries)} downloads from {directory}")
+        return len(entries)
+
+    def _entry_from_info_json(self, path):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                info = json.load(f)
+        except (json.JSONDecodeError, IOError, UnicodeDecodeError):
+            return None
+        if not info.get('id') or not info.get('extractor_key'):
+            return None
+        ext = info.get('ext', '')
+        variant = _file_variant(ext)
+        if not variant:
+            return None
+        return (f"{info['extractor_key'].lower()}:{info['id']}", variant, path[:-len('.info.json')] + f".{ext}")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,656 @@
+import os
+import copy
+import queue
+import threading
+import time
+import logging
+import itertools
+from pathlib import Path
+from collections import namedtuple
+from utils import is_valid_video_url, is_valid_executable, get_site, is_collection_url, get_video_key
+from extraction import InfoStore, iter_collection_urls, PREVIEW_PARAMS
+from fragment_tuner import FragmentConcurrencyTuner
+from download_archive import archive_variant, FILENAME_TEMPLATE
+from transcode_pool import TranscodePool, transcode_audio, transcode_stream, audio_output_path
+from bandwidth import BandwidthScheduler, PRIORITY_INTERACTIVE, PRIORITY_BACKGROUND
+from metrics import Metrics
+from ydl_pool import YoutubeDLPool
+from storage import OutputStorage, InsufficientSpaceError, expected_size
+from event_log import events
+from retry_policy import CircuitBreaker, classify_error, backoff_delay, PERMANENT, THROTTLED
+
+FRAGMENTED_PROTOCOLS = ('m3u8', 'm3u8_native', 'http_dash_segments', 'dash_frag_urls')
+# Minimum seconds between journal writes of a job's byte count.
+JOURNAL_PROGRESS_INTERVAL = 2.0
+# Containers FFmpeg can decode from a pipe, i.e. without seeking back to the header.
+STREAMABLE_AUDIO_EXTS = ('webm', 'weba', 'ogg', 'opus', 'mp3', 'aac', 'flac', 'wav')
+STREAM_READ_SIZE = 256 * 1024
+FINISHED_STATES = ('complete', 'skipped', 'error', 'canceled')
+FINAL_STATE_COUNTERS = {
+    'complete': 'jobs_completed',
+    'skipped': 'jobs_skipped',
+    'error': 'jobs_failed',
+    'canceled': 'jobs_canceled',
+}
+
+
+def total_size(headers):
+    """Full size of an HTTP resource from a (possibly ranged) response's headers."""
+    content_range = headers.get('Content-Range') or ''
+    if content_range.rpartition('/')[2].isdigit():
+        return int(content_range.rpartition('/')[2])
+    return int(headers.get('Content-Length') or 0)
+
+
+def default_options(settings_manager):
+    """Job options for clients that don't pick formats themselves (the service and workers)."""
+    return {
+        'format': 'mp4',
+        'audio_quality': '192',
+        'video_quality': '1080',
+        'audio_format': 'mp3',
+        'save_path': settings_manager.save_path or str(Path.home() / "Downloads"),
+        'parallel_fragments': settings_manager.parallel_fragments,
+        'stream_audio': settings_manager.stream_audio,
+        'priority': PRIORITY_INTERACTIVE,
+    }
+
+
+class DownloadCanceled(Exception):
+    pass
+
+
+ProgressSnapshot = namedtuple('ProgressSnapshot', 'percent speed remaining_time downloaded_bytes total_bytes')
+
+
+class DownloadJob:
+    _ids = itertools.count(1)
+
+    def __init__(self, url, download_type, options, parent_id=None):
+        self.id = next(self._ids)
+        self.url = url
+        self.download_type = download_type
+        self.options = dict(options)
+        self.parent_id = parent_id
+        # Only used by playlist/channel jobs: IDs of the jobs they expanded into.
+        self.children = []
+        self.state = 'queued'
+        self.error = None
+        self.journal_id = None
+        self.video_key = get_video_key(url)
+        self.output_path = None
+        self.retries = 0
+        # Set when shutdown() stops the job, as opposed to the user canceling it.
+        self.interrupted = False
+        # Set when the job downloads into a staging directory instead of its save path.
+        self.staging_path = None
+        self._reservations = []
+        # Filesystem the download is written to, whose reservation shrinks as bytes land.
+        self._download_device = None
+        self._slot_released = False
+        self._journaled_at = 0.0
+        # Bytes already charged to the bandwidth scheduler, per downloaded file.
+        self._charged_bytes = {}
+        self._charge_lock = threading.Lock()
+        # perf_counter() marks used to time the phases yt-dlp runs internally.
+        self._selection_started = None
+        self._download_started = None
+        self._download_finished = None
+        self._merge_started = None
+        # Latest progress only: the hook replaces the snapshot (a single reference
+        # assignment, so no lock is needed) and the UI samples it once per frame.
+        self.progress = None
+        self.stop_event = threading.Event()
+
+    def cancel(self):
+        self.stop_event.set()
+
+    @property
+    def is_finished(self):
+        return self.state in FINISHED_STATES
+
+    @property
+    def is_collection(self):
+        return is_collection_url(self.url)
+
+
+class DownloadManager:
+    """Runs download jobs on a bounded pool of worker threads."""
+
+    def __init__(self, settings_manager, max_workers=None, max_pending_expanded=50, journal=None, archive=None,
+                 transcode_pool=None, bandwidth=None, metrics=None, ydl_pool=None, storage=None, breaker=None):
+        self.settings_manager = settings_manager
+        self.storage = storage or OutputStorage(settings_manager.staging_dir,
+                                                settings_manager.min_free_space_mb * 1024 * 1024)
+        self.ydl_pool = ydl_pool or YoutubeDLPool()
+        self.metrics = metrics or Metrics()
+        self.bandwidth = bandwidth or BandwidthScheduler(
+            settings_manager.bandwidth_limit_kbps * 1024,
+            {PRIORITY_BACKGROUND: settings_manager.background_bandwidth_share})
+        self.journal = journal
+        self.archive = archive
+        self.transcode_pool = transcode_pool or TranscodePool()
+        self.max_workers = max(1, int(max_workers or settings_manager.max_concurrent_downloads))
+        self.jobs = {}
+        self.info_store = InfoStore()
+        self.fragment_tuner = FragmentConcurrencyTuner(settings_manager.min_fragment_concurrency,
+                                                       settings_manager.max_fragment_concurrency)
+        self.breaker = breaker or CircuitBreaker(settings_manager.circuit_failure_threshold,
+                                                 settings_manager.circuit_cooldown_seconds)
+        self._pending = queue.Queue()
+        # (due time, job) pairs held back by a retry backoff or an open circuit.
+        self._delayed = []
+        self._delayed_cond = threading.Condition()
+        self._lock = threading.Lock()
+        self._live_workers = 0
+        self._shutdown = threading.Event()
+        # Expansion stops discovering entries while this many are still waiting for a worker.
+        self._expansion_slots = threading.BoundedSemaphore(max_pending_expanded)
+
+    def start(self):
+        self._spawn_workers()
+        threading.Thread(target=self._release_delayed, name="retry-scheduler", daemon=True).start()
+
+    def submit(self, url, download_type, options, parent_id=None, journal_id=None):
+        job = DownloadJob(url, download_type, options, parent_id)
+        job.journal_id = journal_id
+        if self.journal and journal_id is None:
+            parent = self.jobs.get(parent_id)
+            job.journal_id = self.journal.add(job, parent.journal_id if parent else None)
+        self._enqueue(job)
+        return job
+
+    def submit_many(self, urls, download_type, options):
+        """Queue a batch of URLs, journaled in one transaction.
+
+        Videos already queued or downloading as the same type are not queued again.
+        """
+        active = {job.video_key for job in self.active_jobs() if job.video_key and job.download_type == download_type}
+        jobs = []
+        for url in urls:
+            job = DownloadJob(url, download_type, options)
+            if job.video_key in active:
+                logging.info(f"Skipping {url}: already queued")
+                continue
+            if job.video_key:
+                active.add(job.video_key)
+            jobs.append(job)
+        if self.journal:
+            for job, journal_id in zip(jobs, self.journal.add_many(jobs)):
+                job.journal_id = journal_id
+        for job in jobs:
+            self._enqueue(job)
+        return jobs
+
+    def _enqueue(self, job):
+        with self._lock:
+            self.jobs[job.id] = job
+        if job.is_collection:
+            threading.Thread(target=self._expand_collection, args=(job,), daemon=True).start()
+        else:
+            self._pending.put(job)
+        self.metrics.increment('jobs_submitted')
+        logging.info(f"Queued job {job.id}: {job.url}")
+
+    def resume_unfinished(self):
+        """Re-queue every job the journal shows as unfinished; yt-dlp continues partial files."""
+        if not self.journal:
+            return []
+        jobs = []
+        for row in self.journal.unfinished():
+            logging.info(f"Resuming job {row['id']}: {row['url']} ({row['bytes_done']} bytes done)")
+            jobs.append(self.submit(row['url'], row['download_type'], row['options'], journal_id=row['id']))
+        return jobs
+
+    def is_archived(self, video_key, download_type, options):
+        return bool(self.archive and video_key and self.archive.contains(video_key, archive_variant(download_type, options)))
+
+    def _set_state(self, job, state, error=None):
+        job.error = error
+        job.state = state
+        events.emit('job_state', job=job.id, state=state, error=error)
+        # Stopped by shutdown() rather than by the user: the journal keeps its last
+        # unfinished state and the staging directory stays, so the job resumes on restart.
+        interrupted = state == 'canceled' and job.interrupted and self.journal and job.journal_id
+        if self.journal and job.journal_id and not interrupted:
+            self.journal.set_state(job.journal_id, state, error)
+        if state in FINISHED_STATES:
+            events.forget(job.id)
+            if state == 'error':
+                # What led up to the failure, without having run at DEBUG level.
+                events.dump(f"job {job.id} failed", job.id)
+            self.metrics.increment(FINAL_STATE_COUNTERS[state])
+            if state == 'error':
+                self.metrics.increment('errors')
+            self.metrics.finish_job(job.id, job.url, state)
+            if interrupted:
+                self.storage.release(job._reservations)
+                job._reservations = []
+            else:
+                self._release_storage(job)
+
+    def set_max_workers(self, max_workers):
+        with self._lock:
+            self.max_workers = max(1, int(max_workers))
+        # Surplus workers retire on their own once they finish their current job.
+        self._spawn_workers()
+
+    def cancel(self, job_id):
+        job = self.jobs.get(job_id)
+        if job:
+            job.cancel()
+            for child_id in job.children:
+                self.jobs[child_id].cancel()
+
+    def cancel_all(self):
+        for job in list(self.jobs.values()):
+            if not job.is_finished:
+                job.cancel()
+
+    def active_jobs(self):
+        return [job for job in list(self.jobs.values()) if not job.is_finished]
+
+    def _wait_for_expansion_slot(self, job):
+        while not self._expansion_slots.acquire(timeout=0.5):
+            if job.stop_event.is_set() or self._shutdown.is_set():
+                return False
+        if job.stop_event.is_set():
+            self._expansion_slots.release()
+            return False
+        return True
+
+    def _expand_collection(self, job):
+        """Feed a playlist/channel into the queue entry by entry as the listing is paged in."""
+        self._set_state(job, 'expanding')
+        # After a restart, entries journaled before the crash are resumed on their own.
+        known_urls = self.journal.child_urls(job.journal_id) if self.journal and job.journal_id else set()
+        try:
+            for url in iter_collection_urls(job.url, job.stop_event, self.ydl_pool):
+                if url in known_urls or self.is_archived(get_video_key(url), job.download_type, job.options):
+                    continue
+                if not self._wait_for_expansion_slot(job):
+                    break
+                # Entries of a playlist yield the link to downloads the user started directly.
+                child = self.submit(url, job.download_type, dict(job.options, priority=PRIORITY_BACKGROUND),
+                                    parent_id=job.id)
+                job.children.append(child.id)
+        except Exception as e:
+            logging.error(f"Error expanding {job.url}: {str(e)}")
+            self._fail(job, f"Failed to list playlist entries: {str(e)}")
+            return
+        self._set_state(job, 'canceled' if job.stop_event.is_set() else 'complete')
+
+    def shutdown(self):
+        """Stop all work; journaled jobs that were still running resume on the next start."""
+        self._shutdown.set()
+        for job in list(self.jobs.values()):
+            if not job.is_finished:
+                job.interrupted = True
+                job.cancel()
+        self.transcode_pool.shutdown()
+        self.ydl_pool.close()
+
+    def _spawn_workers(self):
+        with self._lock:
+            missing = self.max_workers - self._live_workers
+            self._live_workers += max(0, missing)
+        for _ in range(missing):
+            threading.Thread(target=self._worker, daemon=True).start()
+
+    def _worker(self):
+        while not self._shutdown.is_set():
+            with self._lock:
+                if self._live_workers > self.max_workers:
+                    self._live_workers -= 1
+                    return
+            try:
+                job = self._pending.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            if job.parent_id is not None and not job._slot_released:
+                job._slot_released = True
+                self._expansion_slots.release()
+            if job.stop_event.is_set():
+                self._set_state(job, 'canceled')
+                continue
+            wait = self.breaker.retry_after(get_site(job.url) or 'other')
+            if wait:
+                self._delay(job, wait)
+                continue
+            self._set_state(job, 'running')
+            self.download_content(job)
+        with self._lock:
+            self._live_workers -= 1
+
+    def _fail(self, job, message):
+        self._set_state(job, 'error', message)
+
+    def _retry_or_fail(self, job, site, message):
+        """Queue the job again after a backoff if the error is transient, otherwise fail it."""
+        kind = classify_error(message)
+        if kind == PERMANENT:
+            self._fail(job, message)
+            return
+        self.breaker.record_failure(site, throttled=kind == THROTTLED)
+        max_retries = self.settings_manager.max_retries
+        if job.retries >= max_retries or job.stop_event.is_set():
+            self._fail(job, message)
+            return
+        delay = backoff_delay(job.retries, self.settings_manager.retry_base_delay, self.settings_manager.retry_max_delay)
+        job.retries += 1
+        self.metrics.increment('retries')
+        logging.warning(f"Job {job.id}: {kind} error, retry {job.retries}/{max_retries} in {delay:.1f}s: {message}")
+        # Keep the staging directory so the partial file resumes; the space is reserved again on the next attempt.
+        self.storage.release(job._reservations)
+        job._reservations = []
+        # Stream URLs from the earlier extraction may be what failed.
+        self.info_store.discard(job.url)
+        self._set_state(job, 'queued', message)
+        self._delay(job, delay)
+
+    def _delay(self, job, seconds):
+        with self._delayed_cond:
+            self._delayed.append((time.monotonic() + seconds, job))
+            self._delayed_cond.notify()
+
+    def _release_delayed(self):
+        """Move delayed jobs back to the queue once they are due; canceled ones go at once."""
+        while not self._shutdown.is_set():
+            with self._delayed_cond:
+                now = time.monotonic()
+                ready, waiting = [], []
+                for entry in self._delayed:
+                    (ready if entry[0] <= now or entry[1].stop_event.is_set() else waiting).append(entry)
+                self._delayed = waiting
+                next_due = min((due for due, _ in self._delayed), default=now + 0.5)
+                if not ready:
+                    self._delayed_cond.wait(min(max(next_due - now, 0.01), 0.5))
+            for _, job in sorted(ready, key=lambda entry: entry[0]):
+                self._pending.put(job)
+
+    def _check_job(self, job):
+        """Local checks that run before any network work; returns False if the job is already settled."""
+        with self.metrics.time_phase('validation', job.id):
+            if not is_valid_executable(self.settings_manager.ffmpeg_path):
+                self._fail(job, "Please set a valid FFmpeg path in the settings.")
+                return False
+            if not is_valid_executable(self.settings_manager.ffprobe_path):
+                self._fail(job, "Please set a valid FFprobe path in the settings.")
+                return False
+            if not is_valid_video_url(job.url):
+                self._fail(job, "Invalid URL. Please enter a valid YouTube or Facebook URL.")
+                return False
+            if self.is_archived(job.video_key, job.download_type, job.options):
+                logging.info(f"Job {job.id}: {job.url} is already in the download archive")
+                self._set_state(job, 'skipped')
+                return False
+        return True
+
+    def download_profile(self, download_type, audio_quality, video_quality):
+        """yt-dlp options shared by every download of one type and quality."""
+        return {
+            'format': f'bestaudio[abr<={audio_quality}]' if download_type == 'audio' else f'bestvideo[height<={video_quality}]+bestaudio/best',
+            'ffmpeg_location': self.settings_manager.ffmpeg_path,
+            'ffprobe_location': self.settings_manager.ffprobe_path,
+            'continuedl': True,
+            'noprogress': True,
+            # Start with large reads; yt-dlp still adapts the block size to the connection.
+            'buffersize': 1024 * 1024,
+            # Playlists and channels are expanded into one job per video up front.
+            'noplaylist': True,
+        }
+
+    def warm_up(self, audio_qualities, video_qualities):
+        """Pre-create yt-dlp instances for previews and every download profile."""
+        profiles = [PREVIEW_PARAMS]
+        profiles += [self.download_profile('audio', quality, None) for quality in audio_qualities]
+        profiles += [self.download_profile('video', None, quality) for quality in video_qualities]
+        self.ydl_pool.warm(profiles)
+
+    def download_content(self, job):
+        if not self._check_job(job):
+            return
+        # Imported here so the window does not wait for yt-dlp at startup.
+        from yt_dlp.utils import DownloadError, ExtractorError, UnsupportedError
+
+        video_url = job.url
+        options = job.options
+        site = get_site(video_url) or 'other'
+        parallel_fragments = options.get('parallel_fragments', False)
+
+        try:
+            # Journaled jobs keep their staging directory across restarts, so partial files resume.
+            job.staging_path = self.storage.staging_path(f"job-{job.journal_id}" if job.journal_id else f"run-{os.getpid()}-{job.id}")
+            ydl_opts = dict(self.download_profile(job.download_type, options['audio_quality'], options['video_quality']),
+                            outtmpl=os.path.join(job.staging_path or options['save_path'], FILENAME_TEMPLATE),
+                            progress_hooks=[lambda d: self.ydl_hook(job, d)],
+                            post_hooks=[lambda filepath: setattr(job, 'output_path', filepath)],
+                            postprocessor_hooks=[lambda d: self.postprocessor_hook(job, d)])
+
+            if parallel_fragments:
+                ydl_opts['concurrent_fragment_downloads'] = self.fragment_tuner.recommend(site)
+
+            info = self.info_store.get(video_url)
+            with self.ydl_pool.checkout(ydl_opts) as ydl:
+                if parallel_fragments:
+                    ydl.add_progress_hook(lambda d: self.fragment_hook(ydl, site, d))
+                if info:
+                    events.emit('extraction_reused', job=job.id)
+                else:
+                    with self.metrics.time_phase('extraction', job.id):
+                        info = ydl.extract_info(video_url, download=False, process=False)
+                        if info.get('_type', 'video') == 'url':
+                            info = ydl.extract_info(info['url'], download=False, process=False)
+                job._selection_started = time.perf_counter()
+                # Select on a copy first: the chosen formats tell how much space to reserve.
+                selected = ydl.process_ie_result(copy.deepcopy(info), download=False)
+                self._reserve_space(job, expected_size(selected))
+                streamed = job.download_type == 'audio' and options.get('stream_audio') and self._can_stream(selected)
+                if streamed:
+                    self._stream_audio(job, ydl, selected)
+                else:
+                    ydl.process_ie_result(info, download=True)
+                self._observe_download(job)
+            self.breaker.record_success(site)
+
+            if streamed:
+                self._complete(job)
+            elif job.download_type == 'audio':
+                self._start_transcode(job)
+            else:
+                self._complete(job)
+
+        except DownloadCanceled:
+            self._set_state(job, 'canceled')
+        except InsufficientSpaceError as e:
+            self._fail(job, str(e))
+        except DownloadError as e:
+            if parallel_fragments:
+                self.fragment_tuner.record_error(site, throttled=classify_error(str(e)) == THROTTLED)
+            self._retry_or_fail(job, site, f"Download error: {str(e)}")
+        except ExtractorError as e:
+            self._retry_or_fail(job, site, f"Extractor error: {str(e)}")
+        except UnsupportedError as e:
+            self._fail(job, f"Unsupported error: {str(e)}")
+        except FileNotFoundError as e:
+            self._fail(job, "FFmpeg or FFprobe was not found.")
+        except Exception as e:
+            if job.stop_event.is_set():
+                self._set_state(job, 'canceled')
+            else:
+                self._fail(job, f"An unexpected error occurred: {str(e)}")
+
+    def _can_stream(self, fmt):
+        return (fmt.get('protocol') in ('http', 'https') and not fmt.get('requested_formats')
+                and (fmt.get('ext') in STREAMABLE_AUDIO_EXTS or fmt.get('container') == 'm4a_dash'))
+
+    def _stream_audio(self, job, ydl, selected):
+        """Download and transcode an audio job in one pass, so only the final file is written."""
+        from yt_dlp.networking.exceptions import RequestError
+        from yt_dlp.utils import DownloadError
+        destination = audio_output_path(ydl.prepare_filename(selected), job.options['audio_format'])
+        logging.info(f"Job {job.id}: streaming format {selected.get('format_id')} into FFmpeg")
+        try:
+            job.output_path = transcode_stream(self.settings_manager.ffmpeg_path,
+                                               self._stream_chunks(job, ydl, selected, destination), destination,
+                                               job.options['audio_format'], job.options['audio_quality'])
+        except RequestError as e:
+            raise DownloadError(str(e))
+        if job._download_finished:
+            # Only the encoder's tail after the last byte; the rest overlapped the download.
+            self.metrics.observe('postprocess', time.perf_counter() - job._download_finished, job.id)
+
+    def _stream_chunks(self, job, ydl, fmt, filename):
+        """Yield the bytes of a progressive format, reporting progress through ydl_hook like yt-dlp does."""
+        from yt_dlp.networking import Request
+        # Sites like YouTube throttle unranged requests, so honour the extractor's chunking.
+        chunk_size = (fmt.get('downloader_options') or {}).get('http_chunk_size')
+        total_bytes = fmt.get('filesize') or 0
+        downloaded_bytes = 0
+        started = time.monotonic()
+        while True:
+            headers = dict(fmt.get('http_headers') or {})
+            if chunk_size:
+                headers['Range'] = f"bytes={downloaded_bytes}-{downloaded_bytes + chunk_size - 1}"
+            received = 0
+            with ydl.urlopen(Request(fmt['url'], headers=headers)) as response:
+                total_bytes = total_bytes or total_size(response.headers)
+                while True:
+                    data = response.read(STREAM_READ_SIZE)
+                    if not data:
+                        break
+                    received += len(data)
+                    downloaded_bytes += len(data)
+                    elapsed = time.monotonic() - started
+                    self.ydl_hook(job, {
+                        'status': 'downloading', 'filename': filename, 'info_dict': fmt,
+                        'downloaded_bytes': downloaded_bytes, 'total_bytes': total_bytes, 'elapsed': elapsed,
+                        'speed': downloaded_bytes / elapsed if elapsed else None,
+                    })
+                    yield data
+            if not chunk_size or received < chunk_size or (total_bytes and downloaded_bytes >= total_bytes):
+                break
+        self.ydl_hook(job, {'status': 'finished', 'filename': filename, 'info_dict': fmt,
+                            'downloaded_bytes': downloaded_bytes, 'total_bytes': downloaded_bytes})
+
+    def _start_transcode(self, job):
+        """Hand the audio conversion to the transcode pool so this worker can take the next URL."""
+        if not job.output_path:
+            self._fail(job, "Downloaded file was not found for conversion.")
+            return
+        self._set_state(job, 'postprocessing')
+        future = self.transcode_pool.submit(self._timed_transcode, job)
+        future.add_done_callback(lambda f: self._transcode_done(job, f))
+
+    def _timed_transcode(self, job):
+        with self.metrics.time_phase('postprocess', job.id):
+            return transcode_audio(self.settings_manager.ffmpeg_path, job.output_path,
+                                   job.options['audio_format'], job.options['audio_quality'])
+
+    def _transcode_done(self, job, future):
+        if future.cancelled():
+            self._set_state(job, 'canceled')
+            return
+        try:
+            job.output_path = future.result()
+        except Exception as e:
+            self._fail(job, f"Post-processing error: {str(e)}")
+            return
+        self._complete(job)
+
+    def _reserve_space(self, job, nbytes):
+        if not nbytes:
+            events.emit('size_unknown', job=job.id)
+            return
+        directories = [job.options['save_path']] + ([job.staging_path] if job.staging_path else [])
+        job._reservations = self.storage.reserve(directories, nbytes)
+        job._download_device = os.stat(job.staging_path or job.options['save_path']).st_dev
+
+    def _release_storage(self, job):
+        self.storage.release(job._reservations)
+        job._reservations = []
+        self.storage.discard(job.staging_path)
+        job.staging_path = None
+
+    def _complete(self, job):
+        if job.staging_path and job.output_path:
+            try:
+                job.output_path = self.storage.publish(job.output_path, job.options['save_path'])
+            except OSError as e:
+                self._fail(job, f"Failed to move the download into {job.options['save_path']}: {str(e)}")
+                return
+        if self.journal and job.journal_id and job.progress:
+            self.journal.set_progress(job.journal_id, job.progress.downloaded_bytes,
+                                      job.progress.total_bytes, job.output_path)
+        if self.archive and job.video_key:
+            self.archive.add(job.video_key, archive_variant(job.download_type, job.options), job.output_path)
+        self._set_state(job, 'complete')
+
+    def _observe_download(self, job):
+        if job._download_started and job._download_finished:
+            self.metrics.observe('download', job._download_finished - job._download_started, job.id)
+
+    def postprocessor_hook(self, job, d):
+        if d.get('postprocessor') != 'Merger':
+            return
+        if d['status'] == 'started':
+            job._merge_started = time.perf_counter()
+        elif d['status'] == 'finished' and job._merge_started:
+            self.metrics.observe('merge', time.perf_counter() - job._merge_started, job.id)
+
+    def ydl_hook(self, job, d):
+        if job.stop_event.is_set():
+            raise DownloadCanceled("Download canceled by user.")
+
+        if d['status'] == 'finished':
+            job._download_finished = time.perf_counter()
+        elif d['status'] == 'downloading':
+            if job._selection_started:
+                # Format selection ends when the first byte of the chosen format is requested.
+                job._download_started = time.perf_counter()
+                self.metrics.observe('format_selection', job._download_started - job._selection_started, job.id)
+                job._selection_started = None
+            downloaded_bytes = d.get('downloaded_bytes') or 0
+            total_bytes = d.get('total_bytes') or d.get('total_bytes_estimate') or 0
+            download_speed = d.get('speed') or 0
+            percent = downloaded_bytes * 100 / total_bytes if total_bytes else 0.0
+            remaining_time = None
+            if download_speed and total_bytes:
+                remaining_time = max(total_bytes - downloaded_bytes, 0) / download_speed
+            # Sampled, so it costs a dictionary lookup on most callbacks.
+            events.progress(job.id, elapsed=d.get('elapsed'), downloaded=downloaded_bytes, total=total_bytes,
+                            speed=download_speed)
+            job.progress = ProgressSnapshot(percent, download_speed, remaining_time, downloaded_bytes, total_bytes)
+
+            job.output_path = d.get('filename') or job.output_path
+            if job.video_key is None and d.get('info_dict', {}).get('extractor_key'):
+                # URLs like share links carry no ID; learn it from the extraction instead.
+                job.video_key = f"{d['info_dict']['extractor_key'].lower()}:{d['info_dict']['id']}"
+            now = time.monotonic()
+            if self.journal and job.journal_id and now - job._journaled_at >= JOURNAL_PROGRESS_INTERVAL:
+                job._journaled_at = now
+                self.journal.set_progress(job.journal_id, downloaded_bytes, total_bytes, job.output_path)
+
+            received = self.throttle(job, d.get('filename'), downloaded_bytes)
+            if received and job._reservations:
+                job._reservations = self.storage.consume(job._reservations, job._download_device, received)
+
+    def throttle(self, job, filename, downloaded_bytes):
+        """Charge newly received bytes to the shared scheduler; sleeping here slows the transfer.
+
+        Returns the number of newly received bytes.
+        """
+        with job._charge_lock:
+            received = max(downloaded_bytes - job._charged_bytes.get(filename, 0), 0)
+            job._charged_bytes[filename] = max(downloaded_bytes, job._charged_bytes.get(filename, 0))
+        self.metrics.increment('bytes_downloaded', received)
+        self.bandwidth.consume(received, job.options.get('priority', PRIORITY_INTERACTIVE), job.stop_event)
+        return received
+
+    def fragment_hook(self, ydl, site, d):
+        if d['status'] != 'finished' or d.get('info_dict', {}).get('protocol') not in FRAGMENTED_PROTOCOLS:
+            return
+        level = ydl.params.get('concurrent_fragment_downloads', 1)
+        self.fragment_tuner.record(site, level, d.get('total_bytes'), d.get('elapsed'))
+        # yt-dlp reads this per format, so e.g. the audio half of a merge already uses the new level.
+        ydl.params['concurrent_fragment_downloads'] = self.fragment_tuner.recommend(site)
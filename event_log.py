@@ -0,0 +1,90 @@
+import json
+import time
+import logging
+import threading
+from collections import deque
+
+# Longest value written into a log line; the ring buffer keeps values as they are.
+MAX_FIELD_LENGTH = 200
+
+
+class _Fields:
+    """Formats event fields as key=value pairs, only if a handler actually emits the record."""
+    __slots__ = ('fields',)
+
+    def __init__(self, fields):
+        self.fields = fields
+
+    def __str__(self):
+        parts = []
+        for key, value in self.fields.items():
+            text = str(value)
+            if len(text) > MAX_FIELD_LENGTH:
+                text = text[:MAX_FIELD_LENGTH] + '...'
+            parts.append(f"{key}={text}")
+        return ' '.join(parts)
+
+
+class EventLog:
+    """Structured events kept in a bounded in-memory ring buffer.
+
+    Recording an event is a tuple append; nothing is formatted unless the
+    logger is enabled for the event's level. When a job fails, dump() writes
+    the buffered events for that job to dump_path, so the context of a failure
+    is available without running everything at DEBUG. Progress events are
+    sampled to at most one per job every progress_interval seconds.
+    """
+
+    def __init__(self, capacity=2000, progress_interval=1.0, dump_path='events_dump.jsonl', logger=None):
+        self.progress_interval = progress_interval
+        self.dump_path = dump_path
+        self.logger = logger or logging.getLogger('events')
+        self._buffer = deque(maxlen=capacity)
+        self._last_progress = {}
+        self._dump_lock = threading.Lock()
+
+    def configure(self, capacity=None, progress_interval=None, dump_path=None):
+        if capacity is not None:
+            self._buffer = deque(self._buffer, maxlen=capacity)
+        if progress_interval is not None:
+            self.progress_interval = progress_interval
+        if dump_path is not None:
+            self.dump_path = dump_path
+
+    def emit(self, event, level=logging.DEBUG, job=None, **fields):
+        self._buffer.append((time.time(), level, event, job, fields))
+        if self.logger.isEnabledFor(level):
+            if job is not None:
+                self.logger.log(level, "%s job=%s %s", event, job, _Fields(fields))
+            else:
+                self.logger.log(level, "%s %s", event, _Fields(fields))
+
+    def progress(self, job, **fields):
+        now = time.monotonic()
+        if now - self._last_progress.get(job, 0.0) < self.progress_interval:
+            return
+        self._last_progress[job] = now
+        self.emit('progress', job=job, **fields)
+
+    def forget(self, job):
+        self._last_progress.pop(job, None)
+
+    def dump(self, reason, job=None):
+        """Write the buffered events (only job's, if given) to dump_path as JSON lines."""
+        entries = [entry for entry in list(self._buffer) if job is None or entry[3] == job]
+        if not self.dump_path or not entries:
+            return
+        with self._dump_lock:
+            try:
+                with open(self.dump_path, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps({'time': time.time(), 'event': 'dump', 'reason': reason, 'job': job}) + '\n')
+                    for at, level, event, entry_job, fields in entries:
+                        f.write(json.dumps(dict(fields, time=at, level=logging.getLevelName(level), event=event,
+                                                job=entry_job), default=str) + '\n')
+            except OSError as e:
+                logging.error(f"Failed to write the event dump: {str(e)}")
+                return
+        self.logger.info(f"Wrote {len(entries)} buffered events to {self.dump_path} ({reason})")
+
+
+events = EventLog()
@@ -0,0 +1,141 @@
+import copy
+import time
+import logging
+import threading
+from collections import OrderedDict
+from urllib.parse import urlparse, parse_qs
+from utils import get_video_key, is_collection_url
+
+# Stream URLs without an explicit expiry are assumed stale after this long.
+STREAM_URL_MAX_AGE = 30 * 60
+# Refuse to reuse stream URLs that expire within this window.
+EXPIRY_MARGIN = 5 * 60
+
+PREVIEW_PARAMS = {'quiet': True, 'skip_download': True}
+COLLECTION_PARAMS = {
+    'quiet': True,
+    'skip_download': True,
+    'extract_flat': 'in_playlist',
+    'lazy_playlist': True,
+}
+
+
+def _open_ydl(params, pool):
+    if pool is not None:
+        return pool.checkout(params)
+    import yt_dlp
+    return yt_dlp.YoutubeDL(params)
+
+
+def extract_info(url, pool=None):
+    """Extract video info without format selection so it can be replayed for any download type."""
+    with _open_ydl(PREVIEW_PARAMS, pool) as ydl:
+        info = ydl.extract_info(url, download=False, process=False)
+        if info.get('_type', 'video') == 'url':
+            info = ydl.extract_info(info['url'], download=False, process=False)
+        info['_extracted_at'] = time.time()
+        return info
+
+
+def _iter_entries(ydl, result, stop_event):
+    from yt_dlp.utils import PagedList
+    entries = result.get('entries') or []
+    if isinstance(entries, PagedList):
+        # getslice() would fetch every page up front; walk the pages lazily instead.
+        entries = entries._getslice(0, None)
+    for entry in entries:
+        if stop_event is not None and stop_event.is_set():
+            return
+        if not entry:
+            continue
+        if entry.get('_type') == 'playlist':
+            yield from _iter_entries(ydl, entry, stop_event)
+        elif entry.get('url') and is_collection_url(entry['url']):
+            # Channel pages list their tabs (videos, shorts, live) as nested playlists.
+            nested = ydl.extract_info(entry['url'], download=False, process=False)
+            yield from _iter_entries(ydl, nested, stop_event)
+        elif entry.get('url') or entry.get('webpage_url'):
+            yield entry.get('webpage_url') or entry['url']
+
+
+def iter_collection_urls(url, stop_event=None, pool=None):
+    """Yield the video URLs of a playlist or channel as the extractor pages through it."""
+    with _open_ydl(COLLECTION_PARAMS, pool) as ydl:
+        result = ydl.extract_info(url, download=False, process=False)
+        yield from _iter_entries(ydl, result, stop_event)
+
+
+def predict_thumbnail_url(url):
+    """Return the thumbnail URL for sites where it follows from the video ID alone."""
+    key = get_video_key(url)
+    if key and key.startswith('youtube:'):
+        return f"https://i.ytimg.com/vi/{key.split(':', 1)[1]}/hqdefault.jpg"
+    return None
+
+
+def get_thumbnail_url(info):
+    if info.get('thumbnail'):
+        return info['thumbnail']
+    thumbnails = info.get('thumbnails') or []
+    return thumbnails[-1].get('url', '') if thumbnails else ''
+
+
+def stream_expiry(info):
+    """Return the earliest 'expire' timestamp found in the info's stream URLs, or None."""
+    expiry = None
+    for fmt in info.get('formats') or []:
+        for key in ('url', 'manifest_url', 'fragment_base_url'):
+            if not fmt.get(key):
+                continue
+            expire = parse_qs(urlparse(fmt[key]).query).get('expire')
+            if expire and expire[0].isdigit():
+                expiry = min(expiry or int(expire[0]), int(expire[0]))
+    return expiry
+
+
+def is_info_fresh(info, now=None):
+    now = now or time.time()
+    expiry = stream_expiry(info)
+    if expiry is not None:
+        return now < expiry - EXPIRY_MARGIN
+    return now - info.get('_extracted_at', 0) < STREAM_URL_MAX_AGE
+
+
+class InfoStore:
+    """Keeps recent extraction results so a preview can be reused by the download."""
+
+    def __init__(self, max_entries=20):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def _key(self, url):
+        return get_video_key(url) or url
+
+    def put(self, url, info):
+        if info.get('_type', 'video') != 'video' or not info.get('formats'):
+            return
+        with self._lock:
+            key = self._key(url)
+            self._entries[key] = info
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get(self, url):
+        """Return a private copy of a fresh info dict for url, or None."""
+        with self._lock:
+            key = self._key(url)
+            info = self._entries.get(key)
+            if info is None:
+                return None
+            if not is_info_fresh(info):
+                logging.debug(f"Discarding stale extraction result for {url}")
+                del self._entries[key]
+                return None
+            # process_ie_result mutates the dict, so never hand out the stored one.
+            return copy.deepcopy(info)
+
+    def discard(self, url):
+        with self._lock:
+            self._entries.pop(self._key(url), None)
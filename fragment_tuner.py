@@ -0,0 +1,69 @@
+import threading
+from event_log import events
+
+# Relative throughput change that counts as a real improvement or regression.
+SIGNIFICANT_CHANGE = 0.05
+# Downloads shorter than this are too noisy to learn from.
+MIN_SAMPLE_SECONDS = 2.0
+
+
+class FragmentConcurrencyTuner:
+    """Picks yt-dlp's concurrent_fragment_downloads per site from measured throughput.
+
+    Concurrency keeps climbing while throughput keeps improving, turns around when
+    it drops, and is halved on errors or throttling. It never leaves [floor, ceiling].
+    """
+
+    def __init__(self, floor=1, ceiling=8):
+        self._lock = threading.Lock()
+        self._sites = {}
+        self.set_bounds(floor, ceiling)
+
+    def set_bounds(self, floor, ceiling):
+        with self._lock:
+            self.floor = max(1, int(floor))
+            self.ceiling = max(self.floor, int(ceiling))
+            for state in self._sites.values():
+                state['level'] = self._clamp(state['level'])
+
+    def _clamp(self, level):
+        return min(self.ceiling, max(self.floor, level))
+
+    def _state(self, site):
+        state = self._sites.get(site)
+        if state is None:
+            state = {'level': self._clamp(2), 'direction': 1, 'throughput': None}
+            self._sites[site] = state
+        return state
+
+    def recommend(self, site):
+        with self._lock:
+            return self._state(site)['level']
+
+    def record(self, site, level, total_bytes, elapsed):
+        """Feed back the result of one fragmented download made at the given level."""
+        if not total_bytes or not elapsed or elapsed < MIN_SAMPLE_SECONDS:
+            return
+        throughput = total_bytes / elapsed
+        with self._lock:
+            state = self._state(site)
+            previous = state['throughput']
+            state['throughput'] = throughput
+            if previous is None or level != state['level']:
+                # First sample, or the level moved underneath us: just take the step.
+                state['level'] = self._clamp(state['level'] + state['direction'])
+            elif throughput > previous * (1 + SIGNIFICANT_CHANGE):
+                state['level'] = self._clamp(level + state['direction'])
+            elif throughput < previous * (1 - SIGNIFICANT_CHANGE):
+                state['direction'] = -state['direction']
+                state['level'] = self._clamp(level + state['direction'])
+            events.emit('fragment_concurrency', site=site, previous=level, level=state['level'],
+                        throughput_kbps=round(throughput / 1024))
+
+    def record_error(self, site, throttled=False):
+        with self._lock:
+            state = self._state(site)
+            state['level'] = self._clamp(state['level'] // 2)
+            state['direction'] = 1
+            state['throughput'] = None
+            events.emit('fragment_concurrency', site=site, level=state['level'], throttled=throttled)
@@ -0,0 +1,377 @@
+import time
+import tkinter as tk
+from tkinter import ttk
+from collections import Counter
+from download_manager import FINISHED_STATES
+
+STATE_FILTERS = ('all', 'active', 'queued', 'expanding', 'running', 'postprocessing') + FINISHED_STATES
+COLUMNS = (
+    ('id', "#", 50),
+    ('url', "URL", 320),
+    ('type', "Type", 60),
+    ('state', "State", 100),
+    ('progress', "Progress", 110),
+    ('speed', "Speed", 90),
+    ('size', "Size", 130),
+    ('eta', "Remaining", 80),
+)
+SORT_KEYS = {
+    'id': lambda row: row.id,
+    'url': lambda row: row.url,
+    'type': lambda row: row.download_type,
+    'state': lambda row: row.state,
+    'progress': lambda row: row.percent,
+    'speed': lambda row: row.speed,
+    'size': lambda row: row.total_bytes,
+    'eta': lambda row: row.remaining_time if row.remaining_time is not None else float('inf'),
+}
+# Columns whose order changes with every progress update; those are re-sorted at most this often.
+LIVE_SORT_COLUMNS = ('progress', 'speed', 'size', 'eta')
+LIVE_SORT_INTERVAL = 1.0
+ROW_HEIGHT = 22
+
+
+class JobRow:
+    """What the dashboard shows for one job; finished jobs keep only this, not the DownloadJob."""
+    __slots__ = ('id', 'parent_id', 'url', 'download_type', 'state', 'error', 'percent', 'speed',
+                 'downloaded_bytes', 'total_bytes', 'remaining_time', 'children_done', 'children_total',
+                 'snapshot')
+
+    def __init__(self, job):
+        self.id = job.id
+        self.parent_id = job.parent_id
+        self.url = job.url
+        self.download_type = job.download_type
+        self.state = None
+        self.error = None
+        self.percent = 0.0
+        self.speed = 0.0
+        self.downloaded_bytes = 0
+        self.total_bytes = 0
+        self.remaining_time = None
+        self.children_done = 0
+        self.children_total = 0
+        self.snapshot = None
+
+    def values(self):
+        if self.children_total or self.state == 'expanding':
+            suffix = "+" if self.state == 'expanding' else ""
+            progress = f"{self.children_done} / {self.children_total}{suffix} videos"
+        elif self.state == 'postprocessing':
+            progress = "Converting..."
+        else:
+            progress = f"{self.percent:.1f}%"
+        active = self.state in ('running', 'postprocessing')
+        return (
+            self.id,
+            self.url,
+            self.download_type,
+            self.error if self.state == 'error' else self.state,
+            progress,
+            f"{self.speed / 1024:.2f} KB/s" if active and self.speed else "",
+            f"{self.downloaded_bytes / (1024 * 1024):.2f} / {self.total_bytes / (1024 * 1024):.2f} MB"
+            if self.total_bytes else "",
+            f"{int(self.remaining_time // 60)}m {int(self.remaining_time % 60)}s"
+            if active and self.remaining_time is not None else "",
+        )
+
+
+class JobTable:
+    """Compact, filterable and sortable model of every job the window has seen.
+
+    update() samples live jobs within a time budget, resuming where it stopped
+    on the next frame, so one frame never pays for scanning thousands of jobs.
+    Only jobs that are not finished yet are sampled.
+    """
+
+    def __init__(self, lookup):
+        # Returns the live job for an ID, used to pick up playlist entries.
+        self.lookup = lookup
+        self.rows = {}
+        self.counts = Counter()
+        self.state_filter = 'all'
+        self.sort_column = 'id'
+        self.sort_reverse = False
+        self._live = {}
+        self._scan = []
+        self._cursor = 0
+        self._order = []
+        self._order_dirty = True
+        self._sorted_at = 0.0
+
+    def add(self, jobs):
+        for job in jobs:
+            if job.id in self.rows:
+                continue
+            self.rows[job.id] = JobRow(job)
+            self._live[job.id] = job
+            self._scan.append(job.id)
+        self._order_dirty = True
+
+    def has_active(self):
+        return bool(self._live)
+
+    def invalidate(self):
+        """Rebuild the order on the next order() call, even for a live sort column."""
+        self._order_dirty = True
+        self._sorted_at = 0.0
+
+    def set_filter(self, state_filter):
+        self.state_filter = state_filter
+        self.invalidate()
+
+    def set_sort(self, column):
+        self.sort_reverse = not self.sort_reverse if column == self.sort_column else False
+        self.sort_column = column
+        self.invalidate()
+
+    def update(self, budget):
+        """Sample live jobs for up to budget seconds; returns (changed row IDs, error messages)."""
+        deadline = time.perf_counter() + budget
+        changed, errors, new_jobs = set(), [], []
+        scanned = 0
+        while scanned < len(self._scan):
+            if self._cursor >= len(self._scan):
+                # Drop finished jobs from the scan list once per pass.
+                self._scan = [job_id for job_id in self._scan if job_id in self._live]
+                self._cursor = 0
+                if not self._scan:
+                    break
+            job_id = self._scan[self._cursor]
+            self._cursor += 1
+            scanned += 1
+            job = self._live.get(job_id)
+            if job is None:
+                continue
+            row = self.rows[job_id]
+            if self._sample(job, row, errors, new_jobs):
+                changed.add(job_id)
+                if row.state in FINISHED_STATES and row.parent_id in self.rows:
+                    self.rows[row.parent_id].children_done += 1
+                    changed.add(row.parent_id)
+            if scanned % 64 == 0 and time.perf_counter() > deadline:
+                break
+        if new_jobs:
+            self.add(new_jobs)
+        return changed, errors
+
+    def _sample(self, job, row, errors, new_jobs):
+        state, snapshot = job.state, job.progress
+        children = len(job.children)
+        if state == row.state and snapshot is row.snapshot and children == row.children_total:
+            return False
+        for child_id in list(job.children)[row.children_total:]:
+            child = self.lookup(child_id)
+            if child is None:
+                # Not visible to this client yet; picked up on a later frame.
+                break
+            new_jobs.append(child)
+            row.children_total += 1
+        if snapshot is not row.snapshot and snapshot is not None:
+            row.snapshot = snapshot
+            row.percent = snapshot.percent
+            row.speed = snapshot.speed or 0.0
+            row.downloaded_bytes = snapshot.downloaded_bytes
+            row.total_bytes = snapshot.total_bytes
+            row.remaining_time = snapshot.remaining_time
+            if self.sort_column in LIVE_SORT_COLUMNS:
+                self._order_dirty = True
+        if state != row.state:
+            if row.state is not None:
+                self.counts[row.state] -= 1
+            self.counts[state] += 1
+            row.state = state
+            row.error = job.error
+            if self.state_filter != 'all' or self.sort_column == 'state':
+                self._order_dirty = True
+            if state == 'error':
+                errors.append(job.error)
+            # A playlist stays live until its listing is done; entries report on their own.
+            if state in FINISHED_STATES:
+                self._live.pop(job.id, None)
+                if state == 'complete':
+                    row.percent = 100.0
+        return True
+
+    def clear_finished(self):
+        for job_id in [job_id for job_id, row in self.rows.items() if row.state in FINISHED_STATES]:
+            state = self.rows.pop(job_id).state
+            self.counts[state] -= 1
+        self.invalidate()
+
+    def _matches(self, row):
+        if self.state_filter == 'all':
+            return True
+        if self.state_filter == 'active':
+            return row.state not in FINISHED_STATES
+        return row.state == self.state_filter
+
+    def order(self):
+        """Job IDs after filtering and sorting; recomputed only when something relevant changed."""
+        now = time.monotonic()
+        if self._order_dirty and (self.sort_column not in LIVE_SORT_COLUMNS
+                                  or now - self._sorted_at >= LIVE_SORT_INTERVAL):
+            rows = [row for row in self.rows.values() if self._matches(row)]
+            rows.sort(key=SORT_KEYS[self.sort_column], reverse=self.sort_reverse)
+            self._order = [row.id for row in rows]
+            self._order_dirty = False
+            self._sorted_at = now
+        return self._order
+
+
+class JobDashboard:
+    """One window listing every job, drawn as a fixed set of Treeview rows.
+
+    The Treeview only ever holds as many items as fit on screen; scrolling
+    moves a window over the model's ordered job IDs and rewrites those items,
+    so the widget cost is the same with ten jobs or ten thousand.
+    """
+
+    def __init__(self, root, table, on_cancel):
+        self.table = table
+        self.on_cancel = on_cancel
+        self.offset = 0
+        self.selected_ids = set()
+        self._slots = []
+        self._drawn = {}
+        self._slot_ids = []
+        self._selecting = False
+        # Rows that changed while the window was hidden.
+        self._undrawn = set()
+
+        self.window = tk.Toplevel(root)
+        self.window.title("Downloads")
+        self.window.geometry("980x480")
+        self.window.protocol("WM_DELETE_WINDOW", self.window.withdraw)
+
+        toolbar = ttk.Frame(self.window)
+        toolbar.pack(side=tk.TOP, fill=tk.X, padx=10, pady=(10, 5))
+        ttk.Label(toolbar, text="Show:").pack(side=tk.LEFT)
+        self.filter_var = tk.StringVar(value=table.state_filter)
+        filter_menu = ttk.Combobox(toolbar, textvariable=self.filter_var, values=STATE_FILTERS,
+                                   state='readonly', width=15)
+        filter_menu.bind('<<ComboboxSelected>>', lambda e: self.apply_filter())
+        filter_menu.pack(side=tk.LEFT, padx=5)
+        ttk.Button(toolbar, text="Cancel Selected", command=self.cancel_selected).pack(side=tk.LEFT, padx=5)
+        ttk.Button(toolbar, text="Clear Finished", command=self.clear_finished).pack(side=tk.LEFT, padx=5)
+        self.summary_label = ttk.Label(toolbar, text="")
+        self.summary_label.pack(side=tk.RIGHT)
+
+        body = ttk.Frame(self.window)
+        body.pack(side=tk.TOP, fill=tk.BOTH, expand=True, padx=10, pady=(0, 10))
+        ttk.Style().configure('Dashboard.Treeview', rowheight=ROW_HEIGHT)
+        self.tree = ttk.Treeview(body, columns=[name for name, _, _ in COLUMNS], show='headings',
+                                 style='Dashboard.Treeview', selectmode='extended')
+        for name, heading, width in COLUMNS:
+            self.tree.heading(name, text=heading, command=lambda column=name: self.sort_by(column))
+            self.tree.column(name, width=width, stretch=name == 'url', anchor=tk.W)
+        self.scrollbar = ttk.Scrollbar(body, orient=tk.VERTICAL, command=self.on_scroll)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.tree.bind('<Configure>', lambda e: self.resize(e.height))
+        self.tree.bind('<<TreeviewSelect>>', self.on_select)
+        self.tree.bind('<MouseWheel>', lambda e: self.scroll_by(-1 if e.delta > 0 else 1, 3))
+        self.tree.bind('<Button-4>', lambda e: self.scroll_by(-1, 3))
+        self.tree.bind('<Button-5>', lambda e: self.scroll_by(1, 3))
+
+    def show(self):
+        self.window.deiconify()
+        self.window.lift()
+
+    def is_visible(self):
+        try:
+            return self.window.winfo_viewable()
+        except tk.TclError:
+            return False
+
+    def resize(self, height):
+        count = max(1, (height - ROW_HEIGHT) // ROW_HEIGHT)
+        while len(self._slots) < count:
+            self._slots.append(self.tree.insert('', tk.END, values=()))
+        while len(self._slots) > count:
+            slot = self._slots.pop()
+            self._drawn.pop(slot, None)
+            self.tree.delete(slot)
+        self.draw(set())
+
+    def apply_filter(self):
+        self.table.set_filter(self.filter_var.get())
+        self.offset = 0
+        self.draw(set())
+
+    def sort_by(self, column):
+        self.table.set_sort(column)
+        for name, heading, _ in COLUMNS:
+            arrow = (" ▼" if self.table.sort_reverse else " ▲") if name == column else ""
+            self.tree.heading(name, text=heading + arrow)
+        self.draw(set())
+
+    def on_scroll(self, action, amount, unit=None):
+        if action == 'moveto':
+            self.offset = int(float(amount) * len(self.table.order()))
+            self.draw(set())
+        else:
+            self.scroll_by(int(amount), len(self._slots) if unit == 'pages' else 1)
+
+    def scroll_by(self, direction, step):
+        self.offset += direction * step
+        self.draw(set())
+
+    def on_select(self, event):
+        if self._selecting:
+            return
+        selected = set(self.tree.selection())
+        # Slots are reused while scrolling, so the selection is kept as job IDs.
+        for slot, job_id in zip(self._slots, self._slot_ids):
+            if slot in selected:
+                self.selected_ids.add(job_id)
+            else:
+                self.selected_ids.discard(job_id)
+
+    def cancel_selected(self):
+        for job_id in list(self.selected_ids):
+            row = self.table.rows.get(job_id)
+            if row and row.state not in FINISHED_STATES:
+                self.on_cancel(job_id)
+        self.selected_ids.clear()
+        self.draw(set())
+
+    def clear_finished(self):
+        self.table.clear_finished()
+        self.selected_ids.intersection_update(self.table.rows)
+        self.draw(set())
+
+    def refresh(self, changed):
+        self._undrawn |= changed
+        if self.is_visible():
+            self.draw(self._undrawn)
+            self._undrawn = set()
+
+    def draw(self, changed):
+        """Rewrite the on-screen rows whose job changed or scrolled into view."""
+        order = self.table.order()
+        visible = len(self._slots)
+        self.offset = max(0, min(self.offset, len(order) - visible))
+        ids = order[self.offset:self.offset + visible]
+        for index, slot in enumerate(self._slots):
+            job_id = ids[index] if index < len(ids) else None
+            previous = self._drawn.get(slot)
+            if previous == job_id and job_id not in changed:
+                continue
+            self._drawn[slot] = job_id
+            self.tree.item(slot, values=self.table.rows[job_id].values() if job_id is not None else ())
+        self._slot_ids = ids
+        selection = [slot for slot, job_id in zip(self._slots, ids) if job_id in self.selected_ids]
+        if set(selection) != set(self.tree.selection()):
+            # Setting the selection fires <<TreeviewSelect>>, which must not rewrite selected_ids.
+            self._selecting = True
+            self.tree.selection_set(selection)
+            self.window.after_idle(setattr, self, '_selecting', False)
+        if order:
+            self.scrollbar.set(self.offset / len(order), min(1.0, (self.offset + visible) / len(order)))
+        else:
+            self.scrollbar.set(0, 1)
+        counts = self.table.counts
+        self.summary_label.config(text=f"{len(self.table.rows)} jobs: {counts['running']} running, "
+                                       f"{counts['queued']} queued, {counts['complete']} complete, "
+                                       f"{counts['error']} failed")
@@ -0,0 +1,106 @@
+import json
+import time
+import logging
+import sqlite3
+import threading
+
+UNFINISHED_STATES = ('queued', 'expanding', 'running', 'postprocessing')
+
+
+class JobJournal:
+    """Durable record of every job so a crashed batch can be resumed after a restart."""
+
+    JOURNAL_FILE = "jobs.db"
+
+    def __init__(self, path=None):
+        self.path = path or self.JOURNAL_FILE
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        # WAL keeps the file consistent across crashes without an fsync per progress update.
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                parent_id INTEGER,
+                url TEXT NOT NULL,
+                download_type TEXT NOT NULL,
+                options TEXT NOT NULL,
+                output_path TEXT,
+                bytes_done INTEGER NOT NULL DEFAULT 0,
+                total_bytes INTEGER NOT NULL DEFAULT 0,
+                state TEXT NOT NULL,
+                error TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_state ON jobs (state)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_parent ON jobs (parent_id)")
+        self._conn.commit()
+
+    def _execute(self, sql, params=()):
+        with self._lock:
+            try:
+                cursor = self._conn.execute(sql, params)
+                self._conn.commit()
+                return cursor
+            except sqlite3.Error as e:
+                logging.error(f"Job journal error: {str(e)}")
+                return None
+
+    def add(self, job, parent_journal_id=None):
+        now = time.time()
+        cursor = self._execute(
+            "INSERT INTO jobs (parent_id, url, download_type, options, state, created_at, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (parent_journal_id, job.url, job.download_type, json.dumps(job.options), job.state, now, now))
+        return cursor.lastrowid if cursor else None
+
+    def add_many(self, jobs):
+        """Journal a batch of top-level jobs with a single commit; returns their IDs in order."""
+        now = time.time()
+        with self._lock:
+            try:
+                ids = [self._conn.execute(
+                    "INSERT INTO jobs (url, download_type, options, state, created_at, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (job.url, job.download_type, json.dumps(job.options), job.state, now, now)).lastrowid
+                    for job in jobs]
+                self._conn.commit()
+                return ids
+            except sqlite3.Error as e:
+                self._conn.rollback()
+                logging.error(f"Job journal error: {str(e)}")
+                return [None] * len(jobs)
+
+    def set_state(self, journal_id, state, error=None):
+        self._execute("UPDATE jobs SET state = ?, error = ?, updated_at = ? WHERE id = ?",
+                      (state, error, time.time(), journal_id))
+
+    def set_progress(self, journal_id, bytes_done, total_bytes, output_path):
+        self._execute("UPDATE jobs SET bytes_done = ?, total_bytes = ?, output_path = COALESCE(?, output_path), "
+                      "updated_at = ? WHERE id = ?",
+                      (bytes_done, total_bytes, output_path, time.time(), journal_id))
+
+    def unfinished(self):
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT * FROM jobs WHERE state IN ({','.join('?' * len(UNFINISHED_STATES))}) ORDER BY id",
+                UNFINISHED_STATES).fetchall()
+        return [dict(row, options=json.loads(row['options'])) for row in rows]
+
+    def completed(self):
+        with self._lock:
+            rows = self._conn.execute("SELECT * FROM jobs WHERE state = 'complete' AND output_path IS NOT NULL").fetchall()
+        return [dict(row, options=json.loads(row['options'])) for row in rows]
+
+    def child_urls(self, parent_journal_id):
+        with self._lock:
+            rows = self._conn.execute("SELECT url FROM jobs WHERE parent_id = ?", (parent_journal_id,)).fetchall()
+        return {row['url'] for row in rows}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,166 @@
+import json
+import time
+import logging
+import sqlite3
+import threading
+
+
+class JobStore:
+    """Queue of jobs shared by several worker hosts.
+
+    A worker claims a job under a lease, keeps renewing it while it works and
+    reports the outcome; a job whose lease runs out (its worker died or lost the
+    store) is handed to the next worker that asks. Leases compare wall-clock
+    times, so the hosts' clocks must roughly agree.
+
+    Backends implement the methods below; SQLiteJobStore is the one shipped.
+    """
+
+    def add_many(self, urls, download_type, options, parent_id=None):
+        """Queue urls and return their job IDs."""
+        raise NotImplementedError
+
+    def claim(self, worker_id, lease_seconds):
+        """Lease the oldest available job to worker_id; returns the job as a dict, or None."""
+        raise NotImplementedError
+
+    def heartbeat(self, job_id, worker_id, lease_seconds, bytes_done=0, total_bytes=0):
+        """Extend a lease; returns False if the job is no longer leased to worker_id."""
+        raise NotImplementedError
+
+    def finish(self, job_id, worker_id, state, error=None, output_path=None):
+        """Record a job's final state; ignored if the lease was lost in the meantime."""
+        raise NotImplementedError
+
+    def release(self, job_id, worker_id):
+        """Give a leased job back to the queue without counting it as an attempt."""
+        raise NotImplementedError
+
+    def child_urls(self, parent_id):
+        raise NotImplementedError
+
+    def counts(self):
+        """Number of jobs per state."""
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class SQLiteJobStore(JobStore):
+    """JobStore in a SQLite file, which can live on a volume every worker mounts.
+
+    WAL needs shared memory between the processes using the file, which network
+    filesystems don't provide, so the store uses a rollback journal and takes
+    the write lock up front for every claim.
+    """
+
+    def __init__(self, path, max_attempts=3, journal_mode='DELETE', busy_timeout=30):
+        self.path = path
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        # Autocommit mode; transactions are opened explicitly with BEGIN IMMEDIATE.
+        self._conn = sqlite3.connect(path, timeout=busy_timeout, isolation_level=None, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute(f"PRAGMA journal_mode={journal_mode}")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS shared_jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                parent_id INTEGER,
+                url TEXT NOT NULL,
+                download_type TEXT NOT NULL,
+                options TEXT NOT NULL,
+                state TEXT NOT NULL,
+                worker_id TEXT,
+                lease_expires REAL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                bytes_done INTEGER NOT NULL DEFAULT 0,
+                total_bytes INTEGER NOT NULL DEFAULT 0,
+                output_path TEXT,
+                error TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS shared_jobs_state ON shared_jobs (state, lease_expires)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS shared_jobs_parent ON shared_jobs (parent_id)")
+
+    def _transaction(self, work):
+        with self._lock:
+            try:
+                self._conn.execute("BEGIN IMMEDIATE")
+                try:
+                    result = work(self._conn)
+                except BaseException:
+                    self._conn.execute("ROLLBACK")
+                    raise
+                self._conn.execute("COMMIT")
+                return result
+            except sqlite3.Error as e:
+                logging.error(f"Job store error: {str(e)}")
+                return None
+
+    def add_many(self, urls, download_type, options, parent_id=None):
+        now = time.time()
+        encoded = json.dumps(options)
+        return self._transaction(lambda conn: [conn.execute(
+            "INSERT INTO shared_jobs (parent_id, url, download_type, options, state, created_at, updated_at) "
+            "VALUES (?, ?, ?, ?, 'queued', ?, ?)",
+            (parent_id, url, download_type, encoded, now, now)).lastrowid for url in urls]) or []
+
+    def claim(self, worker_id, lease_seconds):
+        def work(conn):
+            now = time.time()
+            conn.execute(
+                "UPDATE shared_jobs SET state = 'error', error = 'Abandoned by its workers too many times', "
+                "worker_id = NULL, updated_at = ? WHERE state = 'leased' AND lease_expires < ? AND attempts >= ?",
+                (now, now, self.max_attempts))
+            row = conn.execute(
+                "SELECT * FROM shared_jobs WHERE state = 'queued' OR (state = 'leased' AND lease_expires < ?) "
+                "ORDER BY id LIMIT 1", (now,)).fetchone()
+            if row is None:
+                return None
+            if row['state'] == 'leased':
+                logging.warning(f"Reclaiming job {row['id']} from {row['worker_id']}: its lease expired")
+            conn.execute(
+                "UPDATE shared_jobs SET state = 'leased', worker_id = ?, lease_expires = ?, "
+                "attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                (worker_id, now + lease_seconds, now, row['id']))
+            return dict(row, options=json.loads(row['options']), state='leased', worker_id=worker_id,
+                        lease_expires=now + lease_seconds, attempts=row['attempts'] + 1, updated_at=now)
+        return self._transaction(work)
+
+    def heartbeat(self, job_id, worker_id, lease_seconds, bytes_done=0, total_bytes=0):
+        now = time.time()
+        updated = self._transaction(lambda conn: conn.execute(
+            "UPDATE shared_jobs SET lease_expires = ?, bytes_done = ?, total_bytes = ?, updated_at = ? "
+            "WHERE id = ? AND state = 'leased' AND worker_id = ?",
+            (now + lease_seconds, bytes_done, total_bytes, now, job_id, worker_id)).rowcount)
+        # None means the store was unreachable; keep working and try again on the next beat.
+        return updated is None or updated > 0
+
+    def finish(self, job_id, worker_id, state, error=None, output_path=None):
+        self._transaction(lambda conn: conn.execute(
+            "UPDATE shared_jobs SET state = ?, error = ?, output_path = ?, worker_id = NULL, lease_expires = NULL, "
+            "updated_at = ? WHERE id = ? AND state = 'leased' AND worker_id = ?",
+            (state, error, output_path, time.time(), job_id, worker_id)))
+
+    def release(self, job_id, worker_id):
+        self._transaction(lambda conn: conn.execute(
+            "UPDATE shared_jobs SET state = 'queued', worker_id = NULL, lease_expires = NULL, "
+            "attempts = MAX(attempts - 1, 0), updated_at = ? WHERE id = ? AND state = 'leased' AND worker_id = ?",
+            (time.time(), job_id, worker_id)))
+
+    def child_urls(self, parent_id):
+        with self._lock:
+            rows = self._conn.execute("SELECT url FROM shared_jobs WHERE parent_id = ?", (parent_id,)).fetchall()
+        return {row['url'] for row in rows}
+
+    def counts(self):
+        with self._lock:
+            rows = self._conn.execute("SELECT state, COUNT(*) AS n FROM shared_jobs GROUP BY state").fetchall()
+        return {row['state']: row['n'] for row in rows}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -1,17 +1,73 @@
-import tkinter as tk
-from youtube_downloader import YouTubeDownloaderApp
+import time
+STARTED_AT = time.perf_counter()
+
+import argparse
 import logging
+from event_log import events
+
+
+def record_startup(root, app, exit_after):
+    """Runs on the first idle pass of the main loop, i.e. once the window can take input."""
+    elapsed = time.perf_counter() - STARTED_AT
+    app.metrics.observe('startup', elapsed)
+    logging.info(f"Time to interactive: {elapsed * 1000:.0f} ms")
+    if exit_after:
+        print(f"time_to_interactive_ms={elapsed * 1000:.1f}")
+        root.destroy()
+
 
 if __name__ == "__main__":
-    logging.basicConfig(level=logging.DEBUG, format="%(asctime)s - %(levelname)s - %(message)s")
+    parser = argparse.ArgumentParser(description="YouTube/Facebook downloader")
+    parser.add_argument('--measure-startup', action='store_true',
+                        help="print the time until the window is interactive, then exit")
+    parser.add_argument('--daemon', action='store_true',
+                        help="run the download engine headless and accept jobs over a local HTTP API")
+    parser.add_argument('--port', type=int, help="daemon TCP port on 127.0.0.1 (default: daemon_port setting)")
+    parser.add_argument('--socket', help="also listen on this Unix socket")
+    parser.add_argument('--worker', action='store_true',
+                        help="pull jobs from a shared job store until stopped (one of several hosts)")
+    parser.add_argument('--enqueue', metavar='FILE', help="add the URLs listed in FILE to the shared job store")
+    parser.add_argument('--store', help="shared job store (SQLite file; default: job_store_path setting)")
+    parser.add_argument('--type', choices=('audio', 'video'), default='video', help="download type for --enqueue")
+    parser.add_argument('--lease', type=int, default=60, help="seconds a worker may hold a job between heartbeats")
+    parser.add_argument('--worker-id', help="name of this worker in the job store (default: host-pid)")
+    parser.add_argument('--log-level', default='INFO', choices=('DEBUG', 'INFO', 'WARNING', 'ERROR'),
+                        help="DEBUG also writes every sampled event; failures dump their events either way")
+    parser.add_argument('--event-dump', help="file failed jobs' buffered events are appended to")
+    parser.add_argument('--exit-when-done', action='store_true', help="stop the worker once the store is empty")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=getattr(logging, args.log_level), format="%(asctime)s - %(levelname)s - %(message)s")
+    if args.event_dump:
+        events.configure(dump_path=args.event_dump)
+
+    if args.daemon:
+        from daemon import serve
+        serve(args.port, args.socket)
+        raise SystemExit(0)
+    if args.enqueue or args.worker:
+        from settings_manager import SettingsManager
+        from worker import enqueue_url_file, run_worker
+        store_path = args.store or SettingsManager().job_store_path
+        if args.enqueue:
+            enqueue_url_file(store_path, args.enqueue, args.type)
+        if args.worker and not run_worker(store_path, args.worker_id, args.lease, args.exit_when_done):
+            raise SystemExit(1)
+        raise SystemExit(0)
+
+    # The GUI modules (Tk, ttkbootstrap, PIL) are only needed, and only present on every host, here.
+    import tkinter as tk
+    from tkinter import messagebox
+    from youtube_downloader import YouTubeDownloaderApp
 
     try:
         root = tk.Tk()
         app = YouTubeDownloaderApp(root)
+        root.after_idle(record_startup, root, app, args.measure_startup)
         root.mainloop()
     except tk.TclError as e:
         logging.error(f"Tkinter error: {str(e)}")
-        tk.messagebox.showerror("Tkinter Error", f"Tkinter encountered an error: {str(e)}")
+        messagebox.showerror("Tkinter Error", f"Tkinter encountered an error: {str(e)}")
     except Exception as e:
         logging.error(f"Error during app launch: {str(e)}")
-        tk.messagebox.showerror("Error", f"Failed to launch the app: {str(e)}")
+        messagebox.showerror("Error", f"Failed to launch the app: {str(e)}")
@@ -0,0 +1,105 @@
+import json
+import os
+import time
+import logging
+import threading
+from collections import OrderedDict
+from utils import get_video_key
+
+
+class MetadataCache:
+    """On-disk title/thumbnail cache keyed by canonical video ID, with TTL and LRU eviction."""
+
+    CACHE_DIR = "cache"
+    INDEX_FILE = "metadata.json"
+
+    def __init__(self, cache_dir=None, ttl=7 * 24 * 3600, max_entries=500):
+        self.cache_dir = cache_dir or self.CACHE_DIR
+        self.thumbnail_dir = os.path.join(self.cache_dir, 'thumbnails')
+        self.index_path = os.path.join(self.cache_dir, self.INDEX_FILE)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._load()
+
+    def _load(self):
+        try:
+            if os.path.exists(self.index_path):
+                with open(self.index_path, 'r', encoding='utf-8') as f:
+                    self._entries = OrderedDict(json.load(f))
+        except (json.JSONDecodeError, IOError) as e:
+            logging.error(f"Error loading metadata cache: {str(e)}")
+            self._entries = OrderedDict()
+
+    def _save(self):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = self.index_path + '.tmp'
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self._entries, f)
+            os.replace(tmp_path, self.index_path)
+        except IOError as e:
+            logging.error(f"Error saving metadata cache: {str(e)}")
+
+    def _thumbnail_path(self, key):
+        return os.path.join(self.thumbnail_dir, key.replace(':', '_') + '.jpg')
+
+    def _drop(self, key):
+        entry = self._entries.pop(key, None)
+        if entry and entry.get('thumbnail_path'):
+            try:
+                os.remove(entry['thumbnail_path'])
+            except OSError:
+                pass
+
+    def get(self, url):
+        key = get_video_key(url)
+        if not key:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if time.time() - entry['fetched_at'] > self.ttl:
+                self._drop(key)
+                self._save()
+                return None
+            self._entries.move_to_end(key)
+            return dict(entry)
+
+    def put(self, url, title, thumbnail_url, thumbnail_data=None):
+        key = get_video_key(url)
+        if not key:
+            return
+        with self._lock:
+            previous = self._entries.get(key)
+            thumbnail_path = None
+            if previous and previous['thumbnail_url'] == thumbnail_url:
+                # The thumbnail came from memory this time; keep the copy already on disk.
+                thumbnail_path = previous['thumbnail_path']
+            if thumbnail_data:
+                os.makedirs(self.thumbnail_dir, exist_ok=True)
+                thumbnail_path = self._thumbnail_path(key)
+                try:
+                    with open(thumbnail_path, 'wb') as f:
+                        f.write(thumbnail_data)
+                except IOError as e:
+                    logging.error(f"Error caching thumbnail: {str(e)}")
+                    thumbnail_path = None
+            self._entries[key] = {
+                'title': title,
+                'thumbnail_url': thumbnail_url,
+                'thumbnail_path': thumbnail_path,
+                'fetched_at': time.time(),
+            }
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+            self._save()
+
+    def clear(self):
+        with self._lock:
+            for key in list(self._entries):
+                self._drop(key)
+            self._save()
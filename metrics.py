@@ -0,0 +1,129 @@
+import os
+import json
+import time
+import logging
+import threading
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PHASES = ('startup', 'validation', 'extraction', 'format_selection', 'download', 'merge', 'postprocess', 'thumbnail')
+COUNTERS = ('bytes_downloaded', 'jobs_submitted', 'jobs_completed', 'jobs_skipped', 'jobs_failed',
+            'jobs_canceled', 'errors', 'retries')
+
+
+class Metrics:
+    """Per-phase timings and running counters, exported as JSON or Prometheus text."""
+
+    def __init__(self, recent_jobs=1000):
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+        self.counters = {name: 0 for name in COUNTERS}
+        self.phases = {phase: {'count': 0, 'total': 0.0, 'max': 0.0} for phase in PHASES}
+        self._job_timings = {}
+        self.recent_jobs = deque(maxlen=recent_jobs)
+        self._server = None
+
+    def increment(self, counter, amount=1):
+        with self._lock:
+            self.counters[counter] = self.counters.get(counter, 0) + amount
+
+    def observe(self, phase, seconds, job_id=None):
+        with self._lock:
+            stats = self.phases.setdefault(phase, {'count': 0, 'total': 0.0, 'max': 0.0})
+            stats['count'] += 1
+            stats['total'] += seconds
+            stats['max'] = max(stats['max'], seconds)
+            if job_id is not None:
+                timings = self._job_timings.setdefault(job_id, {})
+                timings[phase] = timings.get(phase, 0.0) + seconds
+
+    @contextmanager
+    def time_phase(self, phase, job_id=None):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(phase, time.perf_counter() - started, job_id)
+
+    def finish_job(self, job_id, url, state):
+        """Move a job's phase timings into the bounded list of recent jobs."""
+        with self._lock:
+            timings = self._job_timings.pop(job_id, {})
+            self.recent_jobs.append({'job_id': job_id, 'url': url, 'state': state,
+                                     'finished_at': time.time(), 'phases': timings})
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'uptime_seconds': time.time() - self.started_at,
+                'counters': dict(self.counters),
+                'phases': {phase: dict(stats) for phase, stats in self.phases.items()},
+                'recent_jobs': list(self.recent_jobs),
+            }
+
+    def to_prometheus(self):
+        data = self.snapshot()
+        lines = ['# TYPE ytd_uptime_seconds gauge', f"ytd_uptime_seconds {data['uptime_seconds']:.3f}"]
+        for name, value in data['counters'].items():
+            lines += [f'# TYPE ytd_{name}_total counter', f'ytd_{name}_total {value}']
+        lines.append('# TYPE ytd_phase_seconds summary')
+        for phase, stats in data['phases'].items():
+            lines.append(f'ytd_phase_seconds_sum{{phase="{phase}"}} {stats["total"]:.6f}')
+            lines.append(f'ytd_phase_seconds_count{{phase="{phase}"}} {stats["count"]}')
+        lines.append('# TYPE ytd_phase_seconds_max gauge')
+        for phase, stats in data['phases'].items():
+            lines.append(f'ytd_phase_seconds_max{{phase="{phase}"}} {stats["max"]:.6f}')
+        return '\n'.join(lines) + '\n'
+
+    def dump(self, path):
+        """Write the metrics to path, as Prometheus text for *.prom files and JSON otherwise."""
+        content = self.to_prometheus() if path.endswith('.prom') else json.dumps(self.snapshot(), indent=2)
+        tmp_path = path + '.tmp'
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(content)
+            os.replace(tmp_path, path)
+        except IOError as e:
+            logging.error(f"Error writing metrics to {path}: {str(e)}")
+
+    def start_exporter(self, port=0, path='', interval=30):
+        """Serve /metrics and /metrics.json on localhost and/or dump to path every interval seconds."""
+        if port:
+            self._server = ThreadingHTTPServer(('127.0.0.1', port), _handler_for(self))
+            threading.Thread(target=self._server.serve_forever, name="metrics-http", daemon=True).start()
+            logging.info(f"Serving metrics on http://127.0.0.1:{port}/metrics")
+        if path:
+            def dump_periodically():
+                while True:
+                    time.sleep(interval)
+                    self.dump(path)
+            threading.Thread(target=dump_periodically, name="metrics-dump", daemon=True).start()
+
+    def stop_exporter(self):
+        if self._server:
+            self._server.shutdown()
+            self._server = None
+
+
+def _handler_for(metrics):
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path == '/metrics':
+                body, content_type = metrics.to_prometheus(), 'text/plain; version=0.0.4'
+            elif self.path == '/metrics.json':
+                body, content_type = json.dumps(metrics.snapshot()), 'application/json'
+            else:
+                self.send_error(404)
+                return
+            payload = body.encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            pass
+
+    return MetricsHandler
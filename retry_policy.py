@@ -0,0 +1,104 @@
+import time
+import random
+import logging
+import threading
+
+# Checked in this order: a throttled or permanent answer wins over a generic network error.
+THROTTLING_MARKERS = ('HTTP Error 429', 'Too Many Requests', 'rate-limit', 'rate limit')
+PERMANENT_MARKERS = (
+    'Private video', 'Video unavailable', 'This video is not available', 'has been removed',
+    'members-only', 'Join this channel', 'Sign in to confirm your age', 'copyright', 'HTTP Error 404',
+    'HTTP Error 410', 'Unsupported URL', 'Requested format is not available', 'not available in your country',
+)
+TRANSIENT_MARKERS = (
+    'HTTP Error 403', 'HTTP Error 500', 'HTTP Error 502', 'HTTP Error 503', 'HTTP Error 504', 'timed out',
+    'Connection reset', 'Connection refused', 'Connection aborted', 'RemoteDisconnected', 'IncompleteRead',
+    'Temporary failure in name resolution', 'Name or service not known', 'Unable to download',
+    'giving up after', 'Network is unreachable', 'SSL',
+)
+
+THROTTLED = 'throttled'
+TRANSIENT = 'transient'
+PERMANENT = 'permanent'
+
+
+def classify_error(message):
+    """Whether an error is worth retrying: THROTTLED, TRANSIENT or PERMANENT.
+
+    yt-dlp reports most failures as DownloadError with the cause in the text, so
+    the message is all there is to go on. Unknown errors count as permanent:
+    retrying something that will never work only adds load on the site.
+    """
+    if any(marker in message for marker in THROTTLING_MARKERS):
+        return THROTTLED
+    if any(marker in message for marker in PERMANENT_MARKERS):
+        return PERMANENT
+    if any(marker in message for marker in TRANSIENT_MARKERS):
+        return TRANSIENT
+    return PERMANENT
+
+
+def backoff_delay(attempt, base_delay, max_delay):
+    """Exponential backoff with full jitter, so retries from a large batch don't arrive together."""
+    return random.uniform(0, min(max_delay, base_delay * 2 ** attempt))
+
+
+class CircuitBreaker:
+    """Per-host breaker that stops new jobs to a site after repeated transient failures.
+
+    After failure_threshold failures in a row (a throttled answer counts double)
+    the host is paused for cooldown seconds. Then one job is let through as a
+    probe: success closes the breaker, failure pauses the host again for twice
+    as long, up to max_cooldown.
+    """
+
+    def __init__(self, failure_threshold=5, cooldown=60, max_cooldown=900):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self._lock = threading.Lock()
+        self._hosts = {}
+
+    def _state(self, host):
+        return self._hosts.setdefault(host, {'failures': 0, 'open_until': 0.0, 'cooldown': self.cooldown,
+                                             'probe_started': None})
+
+    def retry_after(self, host):
+        """Seconds until a job to host may start; 0 means go ahead."""
+        with self._lock:
+            state = self._state(host)
+            now = time.monotonic()
+            remaining = state['open_until'] - now
+            if remaining > 0:
+                return remaining
+            if state['failures'] < self.failure_threshold:
+                return 0
+            # Half open: wait for the probe's outcome, unless it never reported back
+            # (canceled, or skipped before reaching the site).
+            if state['probe_started'] and now - state['probe_started'] < self.cooldown:
+                return min(self.cooldown, 5)
+            state['probe_started'] = now
+            logging.info(f"Circuit for {host} half open, letting one job through")
+            return 0
+
+    def record_success(self, host):
+        with self._lock:
+            state = self._state(host)
+            if state['failures'] >= self.failure_threshold:
+                logging.info(f"Circuit for {host} closed")
+            state.update(failures=0, open_until=0.0, cooldown=self.cooldown, probe_started=None)
+
+    def record_failure(self, host, throttled=False):
+        with self._lock:
+            state = self._state(host)
+            was_probing = state['probe_started'] is not None
+            state['failures'] += 2 if throttled else 1
+            state['probe_started'] = None
+            if state['failures'] < self.failure_threshold:
+                return
+            if was_probing:
+                state['cooldown'] = min(state['cooldown'] * 2, self.max_cooldown)
+            if was_probing or state['open_until'] <= time.monotonic():
+                state['open_until'] = time.monotonic() + state['cooldown']
+                logging.warning(f"Circuit for {host} open for {state['cooldown']:.0f}s after "
+                                f"{state['failures']} failures")
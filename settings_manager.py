@@ -1,50 +1,158 @@
-import json
-import os
-import logging
-from tkinter import messagebox
-
-class SettingsManager:
-    SETTINGS_FILE = "settings.json"
-
-    def __init__(self):
-        self.ffmpeg_path = ''
-        self.ffprobe_path = ''
-        self.save_path = ''
-        self.theme = 'cosmo'
-        self.language = 'en'
-        self.fetch_info_enabled = True 
-        self.load_settings()
-
-    def load_settings(self):
-        try:
-            if os.path.exists(self.SETTINGS_FILE):
-                with open(self.SETTINGS_FILE, 'r') as f:
-                    settings = json.load(f)
-                    self.ffmpeg_path = settings.get('ffmpeg_path', '')
-                    self.ffprobe_path = settings.get('ffprobe_path', '')
-                    self.save_path = settings.get('save_path', '')
-                    self.theme = settings.get('theme', 'cosmo')
-                    self.language = settings.get('language', 'en')
-                    self.fetch_info_enabled = settings.get('fetch_info_enabled', True)
-            else:
-                logging.info(f"Settings file not found. Using default settings.")
-        except (json.JSONDecodeError, IOError) as e:
-            logging.error(f"Error loading settings: {str(e)}")
-            messagebox.showerror("Error", "Failed to load settings. Default settings will be used.")
-
-    def save_settings(self):
-        settings = {
-            'ffmpeg_path': self.ffmpeg_path,
-            'ffprobe_path': self.ffprobe_path,
-            'save_path': self.save_path,
-            'theme': self.theme,
-            'language': self.language,
-            'fetch_info_enabled': self.fetch_info_enabled,
-        }
-        try:
-            with open(self.SETTINGS_FILE, 'w') as f:
-                json.dump(settings, f)
-            logging.info(f"Settings saved to {self.SETTINGS_FILE}")
-        except IOError as e:
-            logging.error(f"Error saving settings: {str(e)}")
-            messagebox.showerror("Error", "Failed to save settings.")
\ No newline at end of file
+import json
+import os
+import logging
+import threading
+
+# Settings changed within this many seconds of each other are written in one go.
+SAVE_DELAY = 1.0
+
+class SettingsManager:
+    SETTINGS_FILE = "settings.json"
+
+    def __init__(self, show_errors=False):
+        # Error dialogs need a display; the daemon and worker only log.
+        self.show_errors = show_errors
+        self.ffmpeg_path = ''
+        self.ffprobe_path = ''
+        self.save_path = ''
+        self.theme = 'cosmo'
+        self.language = 'en'
+        self.fetch_info_enabled = True 
+        self.max_concurrent_downloads = 3
+        self.metadata_cache_ttl_hours = 168
+        self.metadata_cache_size = 500
+        self.parallel_fragments = True
+        self.stream_audio = True
+        self.min_fragment_concurrency = 1
+        self.max_fragment_concurrency = 8
+        self.bandwidth_limit_kbps = 0
+        self.background_bandwidth_share = 0.5
+        self.metrics_port = 0
+        self.metrics_file = ''
+        self.staging_dir = ''
+        self.min_free_space_mb = 100
+        self.max_retries = 3
+        self.retry_base_delay = 2.0
+        self.retry_max_delay = 120
+        self.circuit_failure_threshold = 5
+        self.circuit_cooldown_seconds = 60
+        self.daemon_port = 8765
+        self.daemon_url = ''
+        self.job_store_path = 'shared_jobs.db'
+        self._save_lock = threading.Lock()
+        self._save_timer = None
+        self.load_settings()
+
+    def load_settings(self):
+        try:
+            if os.path.exists(self.SETTINGS_FILE):
+                with open(self.SETTINGS_FILE, 'r') as f:
+                    settings = json.load(f)
+                    self.ffmpeg_path = settings.get('ffmpeg_path', '')
+                    self.ffprobe_path = settings.get('ffprobe_path', '')
+                    self.save_path = settings.get('save_path', '')
+                    self.theme = settings.get('theme', 'cosmo')
+                    self.language = settings.get('language', 'en')
+                    self.fetch_info_enabled = settings.get('fetch_info_enabled', True)
+                    self.max_concurrent_downloads = settings.get('max_concurrent_downloads', 3)
+                    self.metadata_cache_ttl_hours = settings.get('metadata_cache_ttl_hours', 168)
+                    self.metadata_cache_size = settings.get('metadata_cache_size', 500)
+                    self.parallel_fragments = settings.get('parallel_fragments', True)
+                    self.stream_audio = settings.get('stream_audio', True)
+                    self.min_fragment_concurrency = settings.get('min_fragment_concurrency', 1)
+                    self.max_fragment_concurrency = settings.get('max_fragment_concurrency', 8)
+                    self.bandwidth_limit_kbps = settings.get('bandwidth_limit_kbps', 0)
+                    self.background_bandwidth_share = settings.get('background_bandwidth_share', 0.5)
+                    self.metrics_port = settings.get('metrics_port', 0)
+                    self.metrics_file = settings.get('metrics_file', '')
+                    self.staging_dir = settings.get('staging_dir', '')
+                    self.min_free_space_mb = settings.get('min_free_space_mb', 100)
+                    self.max_retries = settings.get('max_retries', 3)
+                    self.retry_base_delay = settings.get('retry_base_delay', 2.0)
+                    self.retry_max_delay = settings.get('retry_max_delay', 120)
+                    self.circuit_failure_threshold = settings.get('circuit_failure_threshold', 5)
+                    self.circuit_cooldown_seconds = settings.get('circuit_cooldown_seconds', 60)
+                    self.daemon_port = settings.get('daemon_port', 8765)
+                    self.daemon_url = settings.get('daemon_url', '')
+                    self.job_store_path = settings.get('job_store_path', 'shared_jobs.db')
+            else:
+                logging.info(f"Settings file not found. Using default settings.")
+        except (json.JSONDecodeError, IOError) as e:
+            logging.error(f"Error loading settings: {str(e)}")
+            self._show_error("Failed to load settings. Default settings will be used.")
+
+    def _show_error(self, message):
+        if self.show_errors:
+            from tkinter import messagebox
+            messagebox.showerror("Error", message)
+
+    def to_dict(self):
+        return {
+            'ffmpeg_path': self.ffmpeg_path,
+            'ffprobe_path': self.ffprobe_path,
+            'save_path': self.save_path,
+            'theme': self.theme,
+            'language': self.language,
+            'fetch_info_enabled': self.fetch_info_enabled,
+            'max_concurrent_downloads': self.max_concurrent_downloads,
+            'metadata_cache_ttl_hours': self.metadata_cache_ttl_hours,
+            'metadata_cache_size': self.metadata_cache_size,
+            'parallel_fragments': self.parallel_fragments,
+            'stream_audio': self.stream_audio,
+            'min_fragment_concurrency': self.min_fragment_concurrency,
+            'max_fragment_concurrency': self.max_fragment_concurrency,
+            'bandwidth_limit_kbps': self.bandwidth_limit_kbps,
+            'background_bandwidth_share': self.background_bandwidth_share,
+            'metrics_port': self.metrics_port,
+            'metrics_file': self.metrics_file,
+            'staging_dir': self.staging_dir,
+            'min_free_space_mb': self.min_free_space_mb,
+            'max_retries': self.max_retries,
+            'retry_base_delay': self.retry_base_delay,
+            'retry_max_delay': self.retry_max_delay,
+            'circuit_failure_threshold': self.circuit_failure_threshold,
+            'circuit_cooldown_seconds': self.circuit_cooldown_seconds,
+            'daemon_port': self.daemon_port,
+            'daemon_url': self.daemon_url,
+            'job_store_path': self.job_store_path,
+        }
+
+    def _write(self):
+        """Write the settings to a temporary file and swap it in, so a crash never leaves a torn file."""
+        with self._save_lock:
+            if self._save_timer is not None:
+                self._save_timer.cancel()
+                self._save_timer = None
+            tmp_path = self.SETTINGS_FILE + '.tmp'
+            with open(tmp_path, 'w') as f:
+                json.dump(self.to_dict(), f)
+            os.replace(tmp_path, self.SETTINGS_FILE)
+        logging.info(f"Settings saved to {self.SETTINGS_FILE}")
+
+    def save_settings(self):
+        try:
+            self._write()
+        except IOError as e:
+            logging.error(f"Error saving settings: {str(e)}")
+            self._show_error("Failed to save settings.")
+
+    def schedule_save(self):
+        """Save shortly, folding any further changes made in the meantime into the same write."""
+        with self._save_lock:
+            if self._save_timer is not None:
+                return
+            self._save_timer = threading.Timer(SAVE_DELAY, self._deferred_save)
+            self._save_timer.daemon = True
+            self._save_timer.start()
+
+    def _deferred_save(self):
+        try:
+            self._write()
+        except IOError as e:
+            # Runs off the Tk thread, so no dialog; the next save retries.
+            logging.error(f"Error saving settings: {str(e)}")
+
+    def flush(self):
+        """Write a pending scheduled save now."""
+        if self._save_timer is not None:
+            self.save_settings()
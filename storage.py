@@ -0,0 +1,116 @@
+import os
+import shutil
+import logging
+import threading
+
+COPY_BUFFER_SIZE = 8 * 1024 * 1024
+
+
+class InsufficientSpaceError(Exception):
+    pass
+
+
+def expected_size(info):
+    """Bytes the selected format(s) of a processed info dict will take, or 0 if unknown."""
+    formats = info.get('requested_formats') or [info]
+    return sum(f.get('filesize') or f.get('filesize_approx') or 0 for f in formats)
+
+
+class OutputStorage:
+    """Free-space reservations, per-job staging directories and atomic publishing.
+
+    With a staging directory set, downloads and conversions run there (ideally on a
+    fast local disk) and only finished files are moved into the output folder, under
+    a temporary name first, so the output folder never holds a partial file.
+    """
+
+    def __init__(self, staging_dir='', min_free_bytes=100 * 1024 * 1024):
+        self.staging_dir = staging_dir
+        self.min_free_bytes = min_free_bytes
+        self._lock = threading.Lock()
+        # Bytes promised to running jobs, per filesystem, not yet visible in disk_usage().
+        self._reserved = {}
+
+    def reserve(self, directories, nbytes):
+        """Claim nbytes on each filesystem holding one of directories.
+
+        Returns the reservations to pass to release(); raises InsufficientSpaceError,
+        claiming nothing, if the bytes don't fit on one of them.
+        """
+        devices = {}
+        for directory in directories:
+            os.makedirs(directory, exist_ok=True)
+            devices.setdefault(os.stat(directory).st_dev, directory)
+        with self._lock:
+            for device, directory in devices.items():
+                free = shutil.disk_usage(directory).free - self._reserved.get(device, 0)
+                if nbytes + self.min_free_bytes > free:
+                    raise InsufficientSpaceError(
+                        f"Not enough free space in {directory}: {nbytes / (1024 * 1024):.0f} MB needed, "
+                        f"{max(free, 0) / (1024 * 1024):.0f} MB available")
+            for device in devices:
+                self._reserved[device] = self._reserved.get(device, 0) + nbytes
+        return [(device, nbytes) for device in devices]
+
+    def consume(self, reservations, device, nbytes):
+        """Shrink the reservation on device by bytes since written there; returns the updated reservations.
+
+        Written bytes already show up in disk_usage(), so keeping them reserved
+        would count them twice and refuse jobs that actually fit.
+        """
+        updated = []
+        with self._lock:
+            for reserved_device, reserved in reservations:
+                if reserved_device == device and nbytes:
+                    used = min(reserved, nbytes)
+                    self._reserved[device] = max(self._reserved.get(device, 0) - used, 0)
+                    reserved -= used
+                updated.append((reserved_device, reserved))
+        return updated
+
+    def release(self, reservations):
+        with self._lock:
+            for device, nbytes in reservations:
+                self._reserved[device] = max(self._reserved.get(device, 0) - nbytes, 0)
+
+    def staging_path(self, name):
+        """Staging directory for one job, or None when downloads go straight to the output folder."""
+        if not self.staging_dir:
+            return None
+        path = os.path.join(self.staging_dir, name)
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def publish(self, path, directory):
+        """Move a finished file into directory atomically and return its new path."""
+        destination = os.path.join(directory, os.path.basename(path))
+        os.makedirs(directory, exist_ok=True)
+        if os.stat(path).st_dev == os.stat(directory).st_dev:
+            os.replace(path, destination)
+            return destination
+        temp_path = os.path.join(directory, f".{os.path.basename(path)}.partial")
+        try:
+            with open(path, 'rb') as src, open(temp_path, 'wb') as dst:
+                size = os.fstat(src.fileno()).st_size
+                if size and hasattr(os, 'posix_fallocate'):
+                    try:
+                        os.posix_fallocate(dst.fileno(), 0, size)
+                    except OSError:
+                        # Not every filesystem (notably some network shares) supports it.
+                        pass
+                # Few large writes instead of many small ones; this matters on network shares.
+                shutil.copyfileobj(src, dst, COPY_BUFFER_SIZE)
+                dst.flush()
+                os.fsync(dst.fileno())
+            os.replace(temp_path, destination)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        os.remove(path)
+        return destination
+
+    def discard(self, staging_path):
+        if staging_path:
+            shutil.rmtree(staging_path, ignore_errors=True)
+            logging.debug(f"Removed staging directory {staging_path}")
@@ -0,0 +1,41 @@
+import os
+import shutil
+import tempfile
+import unittest
+from download_archive import DownloadArchive, archive_variant
+
+VIDEO_OPTIONS = {'video_quality': '1080'}
+AAC_OPTIONS = {'audio_format': 'aac', 'audio_quality': '192'}
+
+
+class RebuildTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.archive = DownloadArchive(os.path.join(self.directory, 'archive.db'))
+
+    def tearDown(self):
+        self.archive.close()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def touch(self, *names):
+        for name in names:
+            open(os.path.join(self.directory, name), 'w').close()
+
+    def test_finished_downloads_are_indexed(self):
+        self.touch('Clip [abcdefghijk].webm', 'Song [dQw4w9WgXcQ].m4a', 'Reel [1234567890123456].mp4')
+        self.assertEqual(self.archive.rebuild(self.directory), 3)
+        self.assertTrue(self.archive.contains('youtube:abcdefghijk', archive_variant('video', VIDEO_OPTIONS)))
+        self.assertTrue(self.archive.contains('youtube:dQw4w9WgXcQ', archive_variant('audio', AAC_OPTIONS)))
+        self.assertTrue(self.archive.contains('facebook:1234567890123456', archive_variant('video', VIDEO_OPTIONS)))
+        self.assertFalse(self.archive.contains('youtube:dQw4w9WgXcQ', archive_variant('video', VIDEO_OPTIONS)))
+
+    def test_unfinished_files_are_skipped(self):
+        self.touch('Clip [abcdefghijk].f137.mp4', 'Clip [abcdefghijk].f251.webm', 'Merge [bbbbbbbbbbb].temp.mp4',
+                   'Song [ccccccccccc].temp.mp3', 'Song [ddddddddddd].partial.m4a', 'Song [eeeeeeeeeee].mp3.part',
+                   'Clip [fffffffffff].jpg')
+        self.assertEqual(self.archive.rebuild(self.directory), 0)
+        self.assertEqual(len(self.archive), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,110 @@
+import os
+import time
+import shutil
+import tempfile
+import unittest
+import multiprocessing
+from job_store import SQLiteJobStore
+
+OPTIONS = {'audio_quality': '192', 'video_quality': '1080', 'save_path': '.'}
+
+
+def claim_all(path, worker_id, results):
+    """Worker process: claim jobs until none are left and report their IDs."""
+    store = SQLiteJobStore(path)
+    claimed = []
+    while True:
+        row = store.claim(worker_id, 60)
+        if row is None:
+            break
+        claimed.append(row['id'])
+        store.finish(row['id'], worker_id, 'complete')
+    store.close()
+    results.put((worker_id, claimed))
+
+
+def claim_and_die(path, ready):
+    """Worker process that takes a lease and exits without finishing or releasing it."""
+    store = SQLiteJobStore(path)
+    row = store.claim('doomed', 0.5)
+    ready.put(row['id'])
+    ready.close()
+    ready.join_thread()
+    os._exit(0)
+
+
+class SQLiteJobStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'jobs.db')
+        self.store = SQLiteJobStore(self.path)
+
+    def tearDown(self):
+        self.store.close()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def add(self, count):
+        return self.store.add_many([f"https://www.youtube.com/watch?v=video{i:06d}" for i in range(count)],
+                                   'video', OPTIONS)
+
+    def test_processes_claim_each_job_once(self):
+        ids = self.add(60)
+        results = multiprocessing.Queue()
+        workers = [multiprocessing.Process(target=claim_all, args=(self.path, f"worker-{i}", results))
+                   for i in range(4)]
+        for worker in workers:
+            worker.start()
+        claimed = [job_id for _ in workers for job_id in results.get(timeout=60)[1]]
+        for worker in workers:
+            worker.join(timeout=60)
+        self.assertEqual(sorted(claimed), ids)
+        self.assertEqual(self.store.counts(), {'complete': 60})
+
+    def test_heartbeat_keeps_the_lease(self):
+        job_id, = self.add(1)
+        self.assertEqual(self.store.claim('a', 0.5)['id'], job_id)
+        for _ in range(3):
+            time.sleep(0.3)
+            self.assertTrue(self.store.heartbeat(job_id, 'a', 0.5, 100, 1000))
+            self.assertIsNone(self.store.claim('b', 0.5))
+        self.assertFalse(self.store.heartbeat(job_id, 'b', 0.5))
+
+    def test_expired_lease_of_a_dead_process_is_reclaimed(self):
+        job_id, = self.add(1)
+        ready = multiprocessing.Queue()
+        doomed = multiprocessing.Process(target=claim_and_die, args=(self.path, ready))
+        doomed.start()
+        self.assertEqual(ready.get(timeout=30), job_id)
+        doomed.join(timeout=30)
+        self.assertIsNone(self.store.claim('survivor', 60))
+
+        time.sleep(0.6)
+        row = self.store.claim('survivor', 60)
+        self.assertEqual(row['id'], job_id)
+        self.assertEqual(row['attempts'], 2)
+        # The old owner has lost the job: its heartbeat fails and its result is ignored.
+        self.assertFalse(self.store.heartbeat(job_id, 'doomed', 60))
+        self.store.finish(job_id, 'doomed', 'error', 'late')
+        self.store.finish(job_id, 'survivor', 'complete')
+        self.assertEqual(self.store.counts(), {'complete': 1})
+
+    def test_job_abandoned_too_often_fails(self):
+        store = SQLiteJobStore(self.path, max_attempts=2)
+        self.addCleanup(store.close)
+        job_id, = self.add(1)
+        for worker_id in ('a', 'b'):
+            self.assertEqual(store.claim(worker_id, 0.1)['id'], job_id)
+            time.sleep(0.2)
+        self.assertIsNone(store.claim('c', 60))
+        self.assertEqual(store.counts(), {'error': 1})
+
+    def test_release_does_not_count_as_an_attempt(self):
+        job_id, = self.add(1)
+        self.store.claim('a', 60)
+        self.store.release(job_id, 'a')
+        row = self.store.claim('b', 60)
+        self.assertEqual((row['id'], row['attempts']), (job_id, 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
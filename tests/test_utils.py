@@ -0,0 +1,79 @@
+import unittest
+from utils import normalize_video_url, get_video_key, collect_video_urls, is_valid_video_url
+
+VIDEO_ID = 'dQw4w9WgXcQ'
+CANONICAL = f'https://www.youtube.com/watch?v={VIDEO_ID}'
+
+
+class NormalizeVideoUrlTest(unittest.TestCase):
+    def test_youtube_link_forms(self):
+        for url in (
+            CANONICAL,
+            f'youtube.com/watch?v={VIDEO_ID}',
+            f'https://youtu.be/{VIDEO_ID}',
+            f'https://youtu.be/{VIDEO_ID}?t=42',
+            f'https://www.youtube.com/watch?v={VIDEO_ID}&t=5s',
+            f'https://www.youtube.com/watch?feature=share&v={VIDEO_ID}',
+            f'https://m.youtube.com/watch?v={VIDEO_ID}',
+            f'https://music.youtube.com/watch?v={VIDEO_ID}&list=RDAMVM{VIDEO_ID}',
+            f'https://www.youtube.com/shorts/{VIDEO_ID}',
+            f'https://www.youtube.com/embed/{VIDEO_ID}',
+            f'https://www.youtube-nocookie.com/embed/{VIDEO_ID}',
+            f'https://www.youtube.com/live/{VIDEO_ID}',
+            f'  {CANONICAL}  ',
+        ):
+            with self.subTest(url=url):
+                self.assertEqual(normalize_video_url(url), ('youtube', VIDEO_ID))
+                self.assertTrue(is_valid_video_url(url.strip()))
+
+    def test_facebook_link_forms(self):
+        for url in (
+            'https://www.facebook.com/watch/?v=1234567890123456',
+            'https://www.facebook.com/watch?v=1234567890123456',
+            'https://www.facebook.com/video.php?v=1234567890123456',
+            'https://www.facebook.com/SomePage/videos/1234567890123456/',
+            'https://www.facebook.com/SomePage/videos/a-title/1234567890123456/',
+            'https://m.facebook.com/reel/1234567890123456',
+            'https://www.facebook.com/reel/1234567890123456',
+        ):
+            with self.subTest(url=url):
+                self.assertEqual(normalize_video_url(url), ('facebook', '1234567890123456'))
+                self.assertTrue(is_valid_video_url(url))
+
+    def test_other_links(self):
+        self.assertIsNone(normalize_video_url(f'https://youtu.be/{VIDEO_ID}x'))
+        self.assertIsNone(normalize_video_url('https://www.youtube.com/playlist?list=PL0123456789'))
+        self.assertTrue(is_valid_video_url('https://www.youtube.com/playlist?list=PL0123456789'))
+        self.assertTrue(is_valid_video_url('https://www.youtube.com/@channel'))
+        self.assertFalse(is_valid_video_url('https://example.com/watch?v=' + VIDEO_ID))
+        self.assertFalse(is_valid_video_url('https://www.youtube.com/feed/trending'))
+
+    def test_video_key(self):
+        self.assertEqual(get_video_key(f'https://youtu.be/{VIDEO_ID}?t=1'), f'youtube:{VIDEO_ID}')
+        self.assertIsNone(get_video_key('https://www.youtube.com/playlist?list=PL0123456789'))
+
+
+class CollectVideoUrlsTest(unittest.TestCase):
+    def test_duplicates_across_link_forms(self):
+        batch = collect_video_urls([
+            CANONICAL,
+            f'https://youtu.be/{VIDEO_ID}',
+            f'https://m.youtube.com/watch?v={VIDEO_ID}&t=10',
+            f'https://www.youtube.com/shorts/{VIDEO_ID}',
+            'https://www.facebook.com/reel/1234567890123456',
+            'https://www.facebook.com/watch/?v=1234567890123456',
+        ])
+        self.assertEqual(batch.urls, [CANONICAL, 'https://www.facebook.com/watch/?v=1234567890123456'])
+        self.assertEqual(batch.duplicates, 4)
+        self.assertEqual(batch.invalid, [])
+
+    def test_collections_kept_as_given_and_invalid_lines_reported(self):
+        playlist = 'https://www.youtube.com/playlist?list=PL0123456789'
+        batch = collect_video_urls(['# comment', '', playlist, playlist, 'not a url', 'https://example.com/video'])
+        self.assertEqual(batch.urls, [playlist])
+        self.assertEqual(batch.duplicates, 1)
+        self.assertEqual(batch.invalid, ['not a url', 'https://example.com/video'])
+
+
+if __name__ == '__main__':
+    unittest.main()
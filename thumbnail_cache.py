@@ -0,0 +1,43 @@
+import io
+import threading
+from collections import OrderedDict
+
+THUMBNAIL_SIZE = (300, 250)
+
+
+def decode_thumbnail(data, size=THUMBNAIL_SIZE):
+    """Decode image bytes and resize them to the preview size."""
+    from PIL import Image
+    img = Image.open(io.BytesIO(data))
+    # JPEG decoders can downscale by 1/2, 1/4 or 1/8 while decoding, which is far
+    # cheaper than decoding the full image and resampling it afterwards.
+    img.draft('RGB', size)
+    if img.mode not in ('RGB', 'RGBA'):
+        img = img.convert('RGB')
+    return img.resize(size, Image.LANCZOS)
+
+
+class ThumbnailCache:
+    """Bounded LRU of ready-to-display thumbnails keyed by thumbnail URL.
+
+    Values are ImageTk.PhotoImage objects, so put() must be called from the Tk thread.
+    """
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._images = OrderedDict()
+
+    def get(self, url):
+        with self._lock:
+            photo = self._images.get(url)
+            if photo is not None:
+                self._images.move_to_end(url)
+            return photo
+
+    def put(self, url, photo):
+        with self._lock:
+            self._images[url] = photo
+            self._images.move_to_end(url)
+            while len(self._images) > self.max_entries:
+                self._images.popitem(last=False)
@@ -0,0 +1,110 @@
+import os
+import logging
+import tempfile
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+LOSSLESS_CODECS = ('flac', 'wav', 'alac')
+
+
+class TranscodeError(Exception):
+    pass
+
+
+def audio_extension(codec):
+    """File extension ffmpeg output for codec gets, e.g. m4a for aac."""
+    from yt_dlp.postprocessor.ffmpeg import ACODECS
+    return ACODECS[codec][0] if codec in ACODECS else codec
+
+
+def audio_output_path(source, codec):
+    return os.path.splitext(source)[0] + '.' + audio_extension(codec)
+
+
+def build_audio_command(ffmpeg_path, source, destination, codec, quality):
+    from yt_dlp.postprocessor.ffmpeg import ACODECS
+    ext, encoder, opts = ACODECS[codec]
+    command = [ffmpeg_path, '-y', '-loglevel', 'error', '-i', source, '-vn']
+    if encoder:
+        command += ['-c:a', encoder]
+    command += list(opts)
+    if codec not in LOSSLESS_CODECS and quality:
+        command += ['-b:a', f'{quality}k']
+    return command + [destination]
+
+
+def transcode_audio(ffmpeg_path, source, codec, quality):
+    """Convert a downloaded audio stream with FFmpeg, replacing the source with the result."""
+    destination = audio_output_path(source, codec)
+    base, ext = os.path.splitext(destination)
+    # Encode into a temporary name so a half-written file never carries the final one.
+    temp_path = f"{base}.temp{ext}"
+    result = subprocess.run(build_audio_command(ffmpeg_path, source, temp_path, codec, quality),
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    if result.returncode != 0:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise TranscodeError(result.stderr.decode('utf-8', 'replace').strip() or f"FFmpeg exited with {result.returncode}")
+    os.replace(temp_path, destination)
+    if os.path.abspath(source) != os.path.abspath(destination):
+        os.remove(source)
+    return destination
+
+
+def transcode_stream(ffmpeg_path, chunks, destination, codec, quality):
+    """Feed chunks of a source stream into FFmpeg's stdin as they arrive, writing only destination.
+
+    If chunks raises (e.g. the download is canceled) FFmpeg is stopped, the partial
+    output removed and the exception re-raised.
+    """
+    base, ext = os.path.splitext(destination)
+    temp_path = f"{base}.temp{ext}"
+    # A file rather than a pipe, so FFmpeg can never block on a full stderr pipe.
+    with tempfile.TemporaryFile() as stderr:
+        process = subprocess.Popen(build_audio_command(ffmpeg_path, 'pipe:0', temp_path, codec, quality),
+                                   stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=stderr)
+        try:
+            try:
+                for chunk in chunks:
+                    process.stdin.write(chunk)
+            except BrokenPipeError:
+                # FFmpeg exited early; its exit status below says why.
+                pass
+            finally:
+                try:
+                    process.stdin.close()
+                except BrokenPipeError:
+                    pass
+            returncode = process.wait()
+        except BaseException:
+            process.kill()
+            process.wait()
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        if returncode != 0:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            stderr.seek(0)
+            raise TranscodeError(stderr.read().decode('utf-8', 'replace').strip() or f"FFmpeg exited with {returncode}")
+    os.replace(temp_path, destination)
+    return destination
+
+
+class TranscodePool:
+    """Runs FFmpeg post-processing as its own pipeline stage, one encode per CPU core.
+
+    Every encode is already a separate FFmpeg process, so plain threads are enough
+    to keep all cores busy; they only wait on their child process.
+    """
+
+    def __init__(self, max_workers=None):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="transcode")
+
+    def submit(self, fn, *args, **kwargs):
+        return self._executor.submit(fn, *args, **kwargs)
+
+    def shutdown(self, wait=False):
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+        logging.debug("Transcode pool shut down")
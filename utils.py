@@ -1,44 +1,118 @@
-import os
-import platform
-import logging
-import re
-import yt_dlp
-from yt_dlp.utils import DownloadError, ExtractorError, UnsupportedError
-from pathlib import Path
-
-
-YOUTUBE_FACEBOOK_URL_REGEX = re.compile(
-    r'(https?://)?(www\.)?(youtube\.com|youtu\.be|facebook\.com)/(shorts/|reel/|watch\?v=|video/|v/|.+/videos/|.+/reels/)?'
-)
-
-def is_valid_video_url(url):
-    return bool(YOUTUBE_FACEBOOK_URL_REGEX.match(url))
-
-def auto_detect_ffmpeg(settings_manager):
-    if platform.system() == 'Windows':
-        ffmpeg_path = 'C:/ffmpeg-7.0.2-essentials_build/bin/ffmpeg.exe'
-        ffprobe_path = 'C:/ffmpeg-7.0.2-essentials_build/bin/ffprobe.exe'
-    elif platform.system() == 'Linux':
-        ffmpeg_path = '/usr/bin/ffmpeg'
-        ffprobe_path = '/usr/bin/ffprobe'
-    elif platform.system() == 'Darwin':
-        ffmpeg_path = '/usr/local/bin/ffmpeg'
-        ffprobe_path = '/usr/local/bin/ffprobe'
-    else:
-        ffmpeg_path = ''
-        ffprobe_path = ''
-
-    if os.path.isfile(ffmpeg_path) and os.path.isfile(ffprobe_path):
-        settings_manager.ffmpeg_path = ffmpeg_path
-        settings_manager.ffprobe_path = ffprobe_path
-        logging.info(f"FFmpeg Path: {settings_manager.ffmpeg_path}")
-        logging.info(f"FFprobe Path: {settings_manager.ffprobe_path}")
-    else:
-        logging.error("FFmpeg and FFprobe are not installed. Please install them.")
-
-def is_valid_executable(path):
-    if not os.path.isfile(path):
-        return False
-    if platform.system() == 'Windows':
-        return path.endswith(".exe") and os.access(path, os.X_OK)
+import os
+import platform
+import logging
+import re
+from collections import namedtuple
+from pathlib import Path
+
+
+ANSI_ESCAPE = re.compile(r'\x1B[@-_][0-?]*[ -/]*[@-~]')
+
+# One pass over a URL yields the site and video ID for every link form of the same
+# video: youtu.be/X, watch?v=X&t=5, m./music. hosts, /shorts/X, /embed/X, ...
+VIDEO_URL_REGEX = re.compile(
+    r'(?:https?://)?(?:(?:www|m|music|web)\.)?(?:'
+    r'(?:youtube(?:-nocookie)?\.com/(?:watch/?\?(?:[^#]*?&)?v=|shorts/|embed/|live/|v/)|youtu\.be/)'
+    r'(?P<youtube>[A-Za-z0-9_-]{11})(?![A-Za-z0-9_-])'
+    r'|facebook\.com/(?:(?:watch/?|video\.php)\?(?:[^#]*?&)?v=|(?:[^?#]+/)?videos/(?:[^/?#]+/)?|(?:[^?#]+/)?reels?/)'
+    r'(?P<facebook>\d+)'
+    r')',
+    re.IGNORECASE,
+)
+CANONICAL_URL_TEMPLATES = {
+    'youtube': 'https://www.youtube.com/watch?v={}',
+    'facebook': 'https://www.facebook.com/watch/?v={}',
+}
+YOUTUBE_COLLECTION_REGEX = re.compile(
+    r'(https?://)?((www|m)\.)?youtube\.com/(playlist\?|channel/|c/|user/|@)'
+)
+
+def is_valid_video_url(url):
+    """True for any link form of a single video, or a playlist or channel link."""
+    return bool(normalize_video_url(url) or is_collection_url(url))
+
+def normalize_video_url(url):
+    """Return (site, video_id) for a single-video URL, or None."""
+    match = VIDEO_URL_REGEX.match(url.strip())
+    if not match:
+        return None
+    if match.group('youtube'):
+        return 'youtube', match.group('youtube')
+    return 'facebook', match.group('facebook')
+
+def canonical_video_url(site, video_id):
+    return CANONICAL_URL_TEMPLATES[site].format(video_id)
+
+def get_video_key(url):
+    """Return a canonical 'site:video_id' key for a video URL, or None."""
+    normalized = normalize_video_url(url)
+    return f"{normalized[0]}:{normalized[1]}" if normalized else None
+
+UrlBatch = namedtuple('UrlBatch', 'urls duplicates invalid')
+
+def collect_video_urls(lines):
+    """Validate and de-duplicate pasted or imported URLs in a single pass.
+
+    Video links are rewritten to their canonical form, so the same video linked
+    several ways is only kept once; playlist and channel links are kept as given.
+    """
+    seen = set()
+    urls, invalid = [], []
+    duplicates = 0
+    for line in lines:
+        url = line.strip()
+        if not url or url.startswith('#'):
+            continue
+        normalized = normalize_video_url(url)
+        if normalized:
+            url = canonical_video_url(*normalized)
+        elif not is_valid_video_url(url):
+            invalid.append(url)
+            continue
+        key = normalized or url
+        if key in seen:
+            duplicates += 1
+            continue
+        seen.add(key)
+        urls.append(url)
+    return UrlBatch(urls, duplicates, invalid)
+
+def is_collection_url(url):
+    """True for playlist and channel URLs, which expand into many videos."""
+    return bool(YOUTUBE_COLLECTION_REGEX.match(url))
+
+def get_site(url):
+    if 'youtube.com' in url or 'youtu.be' in url:
+        return 'youtube'
+    if 'facebook.com' in url:
+        return 'facebook'
+    return None
+
+def auto_detect_ffmpeg(settings_manager):
+    if platform.system() == 'Windows':
+        ffmpeg_path = 'C:/ffmpeg-7.0.2-essentials_build/bin/ffmpeg.exe'
+        ffprobe_path = 'C:/ffmpeg-7.0.2-essentials_build/bin/ffprobe.exe'
+    elif platform.system() == 'Linux':
+        ffmpeg_path = '/usr/bin/ffmpeg'
+        ffprobe_path = '/usr/bin/ffprobe'
+    elif platform.system() == 'Darwin':
+        ffmpeg_path = '/usr/local/bin/ffmpeg'
+        ffprobe_path = '/usr/local/bin/ffprobe'
+    else:
+        ffmpeg_path = ''
+        ffprobe_path = ''
+
+    if os.path.isfile(ffmpeg_path) and os.path.isfile(ffprobe_path):
+        settings_manager.ffmpeg_path = ffmpeg_path
+        settings_manager.ffprobe_path = ffprobe_path
+        logging.info(f"FFmpeg Path: {settings_manager.ffmpeg_path}")
+        logging.info(f"FFprobe Path: {settings_manager.ffprobe_path}")
+    else:
+        logging.error("FFmpeg and FFprobe are not installed. Please install them.")
+
+def is_valid_executable(path):
+    if not os.path.isfile(path):
+        return False
+    if platform.system() == 'Windows':
+        return path.endswith(".exe") and os.access(path, os.X_OK)
     return os.access(path, os.X_OK)
\ No newline at end of file
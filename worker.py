@@ -0,0 +1,205 @@
+import os
+import time
+import socket
+import logging
+import threading
+from download_manager import DownloadManager, default_options
+from download_archive import DownloadArchive
+from bandwidth import PRIORITY_BACKGROUND
+from extraction import iter_collection_urls
+from job_store import SQLiteJobStore
+from settings_manager import SettingsManager
+from utils import auto_detect_ffmpeg, is_valid_executable, is_collection_url, get_video_key, collect_video_urls
+
+DEFAULT_LEASE_SECONDS = 60
+POLL_INTERVAL = 2
+# Playlist entries are written to the store in batches of this many.
+EXPANSION_BATCH = 200
+# States in which a local job may still be writing its files.
+WRITING_STATES = ('running', 'postprocessing')
+
+
+class Worker:
+    """Pulls jobs from a shared JobStore and runs them with a local DownloadManager.
+
+    Each worker holds at most max_concurrent_downloads leases, so the remaining
+    jobs stay available to the other hosts. Playlists are not downloaded by the
+    worker that claims them: their entries go back into the store as separate
+    jobs, which spreads one large playlist over every worker.
+    """
+
+    def __init__(self, store, settings_manager=None, worker_id=None, lease_seconds=DEFAULT_LEASE_SECONDS,
+                 exit_when_done=False, download_manager=None):
+        self.store = store
+        self.settings_manager = settings_manager or SettingsManager()
+        if not (is_valid_executable(self.settings_manager.ffmpeg_path)
+                and is_valid_executable(self.settings_manager.ffprobe_path)):
+            auto_detect_ffmpeg(self.settings_manager)
+        self.download_manager = download_manager or DownloadManager(self.settings_manager, archive=DownloadArchive())
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.lease_seconds = lease_seconds
+        self.exit_when_done = exit_when_done
+        # Store job ID -> local DownloadJob, for every lease this worker holds.
+        self.leases = {}
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._expanders = []
+
+    def config_problems(self):
+        """Why this host can't run jobs; a worker that claimed jobs anyway would fail every one of them."""
+        problems = []
+        if not is_valid_executable(self.settings_manager.ffmpeg_path):
+            problems.append(f"FFmpeg not found (ffmpeg_path={self.settings_manager.ffmpeg_path!r})")
+        if not is_valid_executable(self.settings_manager.ffprobe_path):
+            problems.append(f"FFprobe not found (ffprobe_path={self.settings_manager.ffprobe_path!r})")
+        return problems
+
+    def run(self):
+        """Pull and run jobs until stopped; returns False without claiming anything if the host isn't usable."""
+        problems = self.config_problems()
+        if problems:
+            for problem in problems:
+                logging.error(f"Worker {self.worker_id} not started: {problem}")
+            self.download_manager.shutdown()
+            self.store.close()
+            return False
+        manager = self.download_manager
+        manager.start()
+        heartbeat = threading.Thread(target=self._heartbeat, name="lease-heartbeat", daemon=True)
+        heartbeat.start()
+        logging.info(f"Worker {self.worker_id} pulling jobs from {self.store.path}")
+        try:
+            while not self._stopping.is_set():
+                self._reap()
+                claimed = self._fill()
+                if self.exit_when_done and not claimed and not self.leases and not self._pending():
+                    logging.info(f"Worker {self.worker_id}: no jobs left")
+                    break
+                self._stopping.wait(POLL_INTERVAL)
+        except KeyboardInterrupt:
+            pass
+        self.shutdown()
+        return True
+
+    def _pending(self):
+        counts = self.store.counts()
+        return counts.get('queued', 0) + counts.get('leased', 0)
+
+    def _fill(self):
+        claimed = 0
+        while len(self.leases) < self.download_manager.max_workers and not self._stopping.is_set():
+            row = self.store.claim(self.worker_id, self.lease_seconds)
+            if row is None:
+                break
+            claimed += 1
+            if is_collection_url(row['url']):
+                # Paging a large playlist takes a while; the claim loop keeps reaping and filling meanwhile.
+                with self._lock:
+                    self.leases[row['id']] = None
+                expander = threading.Thread(target=self._expand, args=(row,), name=f"expand-{row['id']}", daemon=True)
+                self._expanders = [thread for thread in self._expanders if thread.is_alive()] + [expander]
+                expander.start()
+                continue
+            job = self.download_manager.submit(row['url'], row['download_type'], row['options'])
+            with self._lock:
+                self.leases[row['id']] = job
+            logging.info(f"Worker {self.worker_id} took job {row['id']}: {row['url']}")
+        return claimed
+
+    def _expand(self, row):
+        """Queue a playlist's entries as jobs of their own; the lease is renewed while paging."""
+        known_urls = self.store.child_urls(row['id'])
+        options = dict(row['options'], priority=PRIORITY_BACKGROUND)
+        batch = []
+        try:
+            for url in iter_collection_urls(row['url'], self._stopping, self.download_manager.ydl_pool):
+                if self._stopping.is_set():
+                    break
+                if url in known_urls or self.download_manager.is_archived(get_video_key(url), row['download_type'], options):
+                    continue
+                batch.append(url)
+                if len(batch) >= EXPANSION_BATCH:
+                    self.store.add_many(batch, row['download_type'], options, parent_id=row['id'])
+                    batch = []
+            self.store.add_many(batch, row['download_type'], options, parent_id=row['id'])
+        except Exception as e:
+            logging.error(f"Error expanding {row['url']}: {str(e)}")
+            self.store.finish(row['id'], self.worker_id, 'error', f"Failed to list playlist entries: {str(e)}")
+        else:
+            if self._stopping.is_set():
+                self.store.release(row['id'], self.worker_id)
+            else:
+                self.store.finish(row['id'], self.worker_id, 'complete')
+        finally:
+            with self._lock:
+                self.leases.pop(row['id'], None)
+
+    def _reap(self):
+        with self._lock:
+            finished = [(job_id, job) for job_id, job in self.leases.items() if job and job.is_finished]
+            for job_id, _ in finished:
+                del self.leases[job_id]
+        for job_id, job in finished:
+            self.store.finish(job_id, self.worker_id, job.state, job.error, job.output_path)
+            logging.info(f"Worker {self.worker_id} finished job {job_id}: {job.state}")
+
+    def _heartbeat(self):
+        while not self._stopping.wait(self.lease_seconds / 3):
+            with self._lock:
+                leases = list(self.leases.items())
+            for job_id, job in leases:
+                progress = job.progress if job else None
+                alive = self.store.heartbeat(job_id, self.worker_id, self.lease_seconds,
+                                             progress.downloaded_bytes if progress else 0,
+                                             progress.total_bytes if progress else 0)
+                if not alive and job and not job.is_finished:
+                    # Another worker owns it now; finishing it here would only duplicate the download.
+                    logging.warning(f"Worker {self.worker_id} lost the lease on job {job_id}, stopping it")
+                    with self._lock:
+                        self.leases.pop(job_id, None)
+                    self.download_manager.cancel(job.id)
+
+    def stop(self):
+        self._stopping.set()
+
+    def shutdown(self):
+        self._stopping.set()
+        # Expansions hand their playlist back themselves once they see the stop.
+        for expander in self._expanders:
+            expander.join(self.lease_seconds)
+        # Stop the local downloads before handing their jobs back, so another host
+        # never starts on a file this one is still writing.
+        self.download_manager.shutdown()
+        with self._lock:
+            leases, self.leases = self.leases, {}
+        deadline = time.monotonic() + self.lease_seconds
+        while any(job and job.state in WRITING_STATES for job in leases.values()) and time.monotonic() < deadline:
+            time.sleep(0.1)
+        for job_id, job in leases.items():
+            if job and job.is_finished and not job.interrupted:
+                self.store.finish(job_id, self.worker_id, job.state, job.error, job.output_path)
+            elif job and job.state in WRITING_STATES:
+                logging.warning(f"Worker {self.worker_id}: job {job_id} did not stop, leaving its lease to expire")
+            else:
+                # Hand it straight back instead of letting the lease run out.
+                self.store.release(job_id, self.worker_id)
+        self.store.close()
+
+
+def enqueue_url_file(store_path, path, download_type):
+    """Add the videos and playlists listed in a text file to the shared store."""
+    with open(path, encoding='utf-8') as f:
+        batch = collect_video_urls(f)
+    store = SQLiteJobStore(store_path)
+    try:
+        ids = store.add_many(batch.urls, download_type, default_options(SettingsManager()))
+    finally:
+        store.close()
+    logging.info(f"Queued {len(ids)} jobs in {store_path} "
+                 f"({batch.duplicates} duplicates, {len(batch.invalid)} invalid lines skipped)")
+    return ids
+
+
+def run_worker(store_path, worker_id=None, lease_seconds=DEFAULT_LEASE_SECONDS, exit_when_done=False):
+    return Worker(SQLiteJobStore(store_path), worker_id=worker_id, lease_seconds=lease_seconds,
+                  exit_when_done=exit_when_done).run()
@@ -0,0 +1,104 @@
+import json
+import logging
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+# Options that differ between jobs sharing a profile; they are swapped in on checkout.
+PER_JOB_PARAMS = ('outtmpl', 'progress_hooks', 'post_hooks', 'postprocessor_hooks', 'concurrent_fragment_downloads')
+WARM_EXTRACTORS = ('Youtube', 'Facebook')
+
+
+def profile_key(params):
+    return json.dumps({k: v for k, v in params.items() if k not in PER_JOB_PARAMS}, sort_keys=True, default=str)
+
+
+class YoutubeDLPool:
+    """Idle, already initialized YoutubeDL instances keyed by option profile.
+
+    Creating a YoutubeDL parses its options and sets up cookies, caches and the
+    extractor list, and each extractor initializes on first use; reusing instances
+    pays for that once per profile instead of once per video. An instance is only
+    ever used by one job at a time.
+    """
+
+    def __init__(self, max_idle_per_profile=4, max_profiles=16):
+        self.max_idle_per_profile = max_idle_per_profile
+        self.max_profiles = max_profiles
+        self._lock = threading.Lock()
+        self._idle = OrderedDict()
+
+    def _create(self, params):
+        import yt_dlp
+        return yt_dlp.YoutubeDL({k: v for k, v in params.items() if k not in PER_JOB_PARAMS})
+
+    def _prepare(self, ydl, params):
+        if 'outtmpl' in params:
+            ydl.params['outtmpl']['default'] = params['outtmpl']
+        ydl.params['concurrent_fragment_downloads'] = params.get('concurrent_fragment_downloads', 1)
+        # yt-dlp only offers add_*_hook, so the previous job's hooks are replaced directly.
+        ydl._progress_hooks = list(params.get('progress_hooks', []))
+        ydl._post_hooks = list(params.get('post_hooks', []))
+        ydl._postprocessor_hooks = list(params.get('postprocessor_hooks', []))
+        ydl._download_retcode = 0
+
+    def _take(self, key):
+        with self._lock:
+            instances = self._idle.get(key)
+            if instances:
+                self._idle.move_to_end(key)
+                return instances.pop()
+        return None
+
+    def _put(self, key, ydl):
+        evicted = []
+        with self._lock:
+            instances = self._idle.setdefault(key, [])
+            self._idle.move_to_end(key)
+            if len(instances) < self.max_idle_per_profile:
+                instances.append(ydl)
+            else:
+                evicted.append(ydl)
+            while len(self._idle) > self.max_profiles:
+                evicted.extend(self._idle.popitem(last=False)[1])
+        for instance in evicted:
+            instance.close()
+
+    @contextmanager
+    def checkout(self, params):
+        """Borrow an instance configured with params, returning it to the pool afterwards."""
+        key = profile_key(params)
+        ydl = self._take(key) or self._create(params)
+        self._prepare(ydl, params)
+        try:
+            yield ydl
+        except BaseException:
+            # Don't hand an instance that failed mid-run to the next job.
+            ydl.close()
+            raise
+        self._prepare(ydl, {})
+        self._put(key, ydl)
+
+    def warm(self, profiles):
+        """Create one ready instance per profile, with the common extractors initialized."""
+        for params in profiles:
+            key = profile_key(params)
+            with self._lock:
+                if self._idle.get(key):
+                    continue
+            try:
+                ydl = self._create(params)
+                for name in WARM_EXTRACTORS:
+                    ydl.get_info_extractor(name)
+            except Exception as e:
+                logging.error(f"Failed to warm up yt-dlp: {str(e)}")
+                return
+            self._put(key, ydl)
+        logging.debug(f"Warmed {len(profiles)} yt-dlp profiles")
+
+    def close(self):
+        with self._lock:
+            instances = [ydl for idle in self._idle.values() for ydl in idle]
+            self._idle.clear()
+        for ydl in instances:
+            ydl.close()
@@ -1,26 +1,45 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 import threading
-import queue
 import logging
-from PIL import Image, ImageTk
-from pytube import YouTube
-import requests
+import importlib
 import ttkbootstrap as tb
 from settings_manager import SettingsManager
-from utils import is_valid_video_url, auto_detect_ffmpeg, is_valid_executable, YOUTUBE_FACEBOOK_URL_REGEX
+from download_manager import DownloadManager
+from metrics import Metrics
+from bandwidth import PRIORITY_INTERACTIVE, PRIORITY_BACKGROUND
+from job_journal import JobJournal
+from download_archive import DownloadArchive
+from metadata_cache import MetadataCache
+from extraction import extract_info, get_thumbnail_url, predict_thumbnail_url
+from async_runtime import BackgroundLoop
+from daemon import DaemonClient
+from job_dashboard import JobTable, JobDashboard
+from event_log import events
+from thumbnail_cache import ThumbnailCache, decode_thumbnail
+from utils import is_valid_video_url, auto_detect_ffmpeg, is_valid_executable, collect_video_urls
 import os
 from pathlib import Path
 import platform
-import yt_dlp
-from yt_dlp.utils import DownloadError, ExtractorError, UnsupportedError
-import re
 import asyncio
-import aiohttp
-import time
 import itertools
 
-ANSI_ESCAPE = re.compile(r'\x1B[@-_][0-?]*[ -/]*[@-~]')
+
+PROGRESS_REFRESH_MS = 100
+# Share of each refresh the dashboard may spend sampling jobs; the rest resumes next frame.
+PROGRESS_FRAME_BUDGET = 0.008
+# Not needed to draw the window; imported on a background thread once it is up.
+DEFERRED_MODULES = ('yt_dlp', 'yt_dlp.postprocessor.ffmpeg', 'aiohttp', 'PIL.Image', 'PIL.ImageTk')
+
+
+def preload_modules():
+    for name in DEFERRED_MODULES:
+        try:
+            importlib.import_module(name)
+        except ImportError as e:
+            logging.error(f"Failed to import {name}: {str(e)}")
+
+
 class YouTubeDownloaderApp:
     translations = {
         'en': {
@@ -39,11 +58,17 @@ class YouTubeDownloaderApp:
             'ffmpeg_path': 'Set FFmpeg Path:',
             'ffprobe_path': 'Set FFprobe Path:',
             'settings': 'Settings',
+            'downloads': 'Downloads',
             'save': 'Save Settings',
             'cancel_download': 'Cancel Download',
             'paste': 'Paste',
+            'import_urls': 'Import List',
             'choose audio format': 'Choose Audio Format:',
             'fetch_info': 'Fetch Video Info',
+            'max_concurrent_downloads': 'Max Concurrent Downloads:',
+            'rebuild_archive': 'Rebuild Download Index',
+            'bandwidth_limit': 'Bandwidth Limit (KB/s, 0 = unlimited):',
+            'background_share': 'Playlist Share of Bandwidth (%):',
         },
         'vi': {
             'welcome': 'Chào mừng bạn đến với Trình tải xuống YouTube',
@@ -61,11 +86,17 @@ class YouTubeDownloaderApp:
             'ffmpeg_path': 'Đặt Đường dẫn FFmpeg:',
             'ffprobe_path': 'Đặt Đường dẫn FFprobe:',
             'settings': 'Cài đặt',
+            'downloads': 'Danh sách tải',
             'save': 'Lưu Cài đặt',
             'cancel_download': 'Hủy Tải xuống',
             'paste': 'Dán',
+            'import_urls': 'Nhập danh sách',
             'choose audio format': 'Chọn định dạng âm thanh:',
             'fetch_info': 'Lấy thông tin video',
+            'max_concurrent_downloads': 'Số lượt tải đồng thời tối đa:',
+            'rebuild_archive': 'Xây dựng lại chỉ mục tải xuống',
+            'bandwidth_limit': 'Giới hạn băng thông (KB/s, 0 = không giới hạn):',
+            'background_share': 'Phần băng thông cho danh sách phát (%):',
         }
     }
 
@@ -88,19 +119,53 @@ class YouTubeDownloaderApp:
 
     def __init__(self, root):
         self.root = root
-        self.settings_manager = SettingsManager()
+        self.settings_manager = SettingsManager(show_errors=True)
         self.current_language = self.settings_manager.language
-        self._stop_event = threading.Event()
-        self.queue = queue.Queue()
+        # Only built when downloading locally; a client of the download service leaves the work to it.
+        self.download_manager = None
+        # Where jobs are submitted and tracked: the local engine, or a running download service.
+        self.job_source = self.connect_job_source()
+        if self.download_manager:
+            self.metrics = self.download_manager.metrics
+            self.metrics.start_exporter(self.settings_manager.metrics_port, self.settings_manager.metrics_file)
+        else:
+            # Kept for the preview timings only; the exporter port and file belong to the service.
+            self.metrics = Metrics()
+        self.job_table = JobTable(lambda job_id: self.job_source.jobs.get(job_id))
+        # Created with the first download.
+        self.dashboard = None
+        self._progress_polling = False
+        self.background_loop = BackgroundLoop()
+        self.background_loop.start()
+        self.fetch_task = None
+        self.preview_url = None
+        # URLs from a pasted or imported list, already validated and de-duplicated.
+        self.bulk_urls = []
+        self.thumbnail_cache = ThumbnailCache()
+        self.metadata_cache = MetadataCache(ttl=self.settings_manager.metadata_cache_ttl_hours * 3600,
+                                            max_entries=self.settings_manager.metadata_cache_size)
         self.init_ui()
-        auto_detect_ffmpeg(self.settings_manager)
-        self.progress_window = None
+        if not (self.is_valid_executable(self.settings_manager.ffmpeg_path)
+                and self.is_valid_executable(self.settings_manager.ffprobe_path)):
+            auto_detect_ffmpeg(self.settings_manager)
+            self.settings_manager.schedule_save()
         self.path_var.set(self.settings_manager.save_path)
-        self.settings_manager.load_settings()
-        self.switch_theme(self.settings_manager.theme)
         self.update_texts()
-        self.settings_manager.save_settings()
-        self.settings_manager.load_settings()
+        self.root.after_idle(self.background_loop.executor.submit, self.warm_up)
+        self.root.after_idle(self.load_settings_icon)
+        self.root.after(0, self.resume_unfinished_jobs)
+
+    def connect_job_source(self):
+        if self.settings_manager.daemon_url:
+            client = DaemonClient(self.settings_manager.daemon_url)
+            if client.is_available():
+                logging.info(f"Using the download service at {self.settings_manager.daemon_url}")
+                return client
+            client.close()
+            logging.warning(f"Download service at {self.settings_manager.daemon_url} is not reachable, downloading locally")
+        self.download_manager = DownloadManager(self.settings_manager, journal=JobJournal(), archive=DownloadArchive())
+        self.download_manager.start()
+        return self.download_manager
 
     def init_ui(self):
         style = tb.Style(theme=self.settings_manager.theme)
@@ -115,20 +180,14 @@ class YouTubeDownloaderApp:
         nav_frame = ttk.Frame(self.root)
         nav_frame.pack(side=tk.TOP, fill=tk.X)
 
-        try:
-            original_image = Image.open("assets/setting.png")
-            resized_image = original_image.resize((12, 12), Image.LANCZOS) 
-            self.settings_image = ImageTk.PhotoImage(resized_image)
-        except Exception as e:
-            logging.error(f"Failed to load settings image: {str(e)}")
-            self.settings_image = None
-
-        if self.settings_image:
-            self.settings_button = ttk.Button(nav_frame, image=self.settings_image, command=self.open_settings_window)
-        else:
-            self.settings_button = ttk.Button(nav_frame, text=self.translations[self.current_language]['settings'],
-                                              command=self.open_settings_window)
+        # The icon replaces the text once the window is up; see load_settings_icon.
+        self.settings_image = None
+        self.settings_button = ttk.Button(nav_frame, text=self.translations[self.current_language]['settings'],
+                                          command=self.open_settings_window)
         self.settings_button.pack(side=tk.LEFT, padx=10, pady=10)
+        self.downloads_button = ttk.Button(nav_frame, text=self.translations[self.current_language]['downloads'],
+                                           command=self.show_dashboard)
+        self.downloads_button.pack(side=tk.LEFT, padx=(0, 10), pady=10)
 
         self.language_label = ttk.Label(nav_frame, text=self.translations[self.current_language]['choose_language'])
         self.language_label.pack(side=tk.LEFT, padx=5)
@@ -152,6 +211,9 @@ class YouTubeDownloaderApp:
 
         self.paste_button = ttk.Button(url_frame, text=self.translations[self.current_language]['paste'], command=self.paste_url)
         self.paste_button.pack(side=tk.LEFT, padx=5)
+        self.import_button = ttk.Button(url_frame, text=self.translations[self.current_language]['import_urls'],
+                                        command=self.import_url_file)
+        self.import_button.pack(side=tk.LEFT, padx=5)
 
         self.title_label = ttk.Label(main_frame, text="Title will appear here")
         self.title_label.pack(pady=5)
@@ -222,6 +284,22 @@ class YouTubeDownloaderApp:
         
         
 
+    def warm_up(self):
+        preload_modules()
+        # A client of the download service has nothing to warm: extraction happens there.
+        if self.download_manager:
+            self.download_manager.warm_up(self.audio_quality_mapping.values(), self.video_quality_mapping.values())
+
+    def load_settings_icon(self):
+        try:
+            from PIL import Image, ImageTk
+            original_image = Image.open("assets/setting.png")
+            resized_image = original_image.resize((12, 12), Image.LANCZOS)
+            self.settings_image = ImageTk.PhotoImage(resized_image)
+            self.settings_button.config(image=self.settings_image)
+        except Exception as e:
+            logging.error(f"Failed to load settings image: {str(e)}")
+
     def paste_url_event(self, event):
         self.paste_url()
         return "break" 
@@ -233,7 +311,10 @@ class YouTubeDownloaderApp:
     def paste_url(self):
         try:
             clipboard_content = self.root.clipboard_get().strip()
-            logging.debug(f"Pasted URL: {clipboard_content}")
+            if len(clipboard_content.split()) > 1:
+                self.load_url_list(clipboard_content.split())
+                return
+            events.emit('url_pasted', url=clipboard_content)
             self.url_entry.delete(0, tk.END)
             self.url_entry.insert(0, clipboard_content)
             self.validate_inputs()
@@ -243,78 +324,139 @@ class YouTubeDownloaderApp:
         except tk.TclError:
             messagebox.showerror("Error", "Failed to paste from clipboard.")
 
-    async def fetch_facebook_video_info(self, session, url):
+    def import_url_file(self):
+        file_selected = filedialog.askopenfilename(filetypes=[("Text files", "*.txt"), ("All files", "*.*")])
+        if not file_selected:
+            return
         try:
-            ydl_opts = {
-                'quiet': True,
-                'skip_download': True,
-            }
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                info_dict = ydl.extract_info(url, download=False)
-                title = info_dict.get('title', 'Unknown Title')
-                thumbnail_url = info_dict.get('thumbnail', '')
-                logging.debug(f"Fetched Facebook video info: Title - {title}, Thumbnail - {thumbnail_url}")
-                logging.debug(f"Full info dict: {info_dict}")
+            with open(file_selected, 'r', encoding='utf-8', errors='replace') as f:
+                self.load_url_list(f.read().split())
+        except IOError as e:
+            self.display_error(f"Failed to read {file_selected}: {str(e)}")
+
+    def load_url_list(self, lines):
+        batch = collect_video_urls(lines)
+        logging.info(f"Loaded {len(batch.urls)} URLs ({batch.duplicates} duplicates, {len(batch.invalid)} invalid)")
+        self.bulk_urls = batch.urls
+        self.url_entry.delete(0, tk.END)
+        self.clear_video_info()
+        self.status_label.config(text=f"{len(batch.urls)} videos ready, {batch.duplicates} duplicates and "
+                                      f"{len(batch.invalid)} invalid links skipped", style="TLabel")
+        self.validate_inputs()
 
-                self.title_label.config(text=title)
+    async def fetch_extracted_video_info(self, session, url, site):
+        from yt_dlp.utils import DownloadError
+        # Start the thumbnail request right away when its URL is known before extraction.
+        thumbnail_url = predict_thumbnail_url(url)
+        thumbnail_task = None
+        if thumbnail_url:
+            thumbnail_task = asyncio.ensure_future(self.download_and_display_thumbnail_async(session, url, thumbnail_url))
+        try:
+            if self.download_manager:
+                with self.metrics.time_phase('extraction'):
+                    info_dict = await self.background_loop.run_blocking(extract_info, url, self.download_manager.ydl_pool)
+                # Keep the full extraction (formats included) so the download can skip re-extracting.
+                self.download_manager.info_store.put(url, info_dict)
+                title = info_dict.get('title', 'Unknown Title')
+                extracted_thumbnail = get_thumbnail_url(info_dict)
+            else:
+                # The service keeps the extraction for the download that usually follows.
+                with self.metrics.time_phase('extraction'):
+                    preview = await self.background_loop.run_blocking(self.job_source.preview, url)
+                title = preview.get('title') or 'Unknown Title'
+                extracted_thumbnail = preview.get('thumbnail')
+            if not thumbnail_task:
+                thumbnail_url = extracted_thumbnail
                 if thumbnail_url:
-                    await self.download_and_display_thumbnail_async(session, thumbnail_url)
-        except yt_dlp.utils.DownloadError as e:
+                    thumbnail_task = asyncio.ensure_future(self.download_and_display_thumbnail_async(session, url, thumbnail_url))
+            events.emit('preview_fetched', site=site, title=title, thumbnail=thumbnail_url)
+
+            self.root.after(0, self.show_title, url, title)
+            thumbnail_data = await thumbnail_task if thumbnail_task else None
+            # Rewrites the index and the thumbnail file; kept off the loop thread.
+            await self.background_loop.run_blocking(self.metadata_cache.put, url, title, thumbnail_url, thumbnail_data)
+        except DownloadError as e:
             logging.error(f"Download error: {str(e)}")
-            messagebox.showerror("Error", f"Failed to fetch Facebook video info: {str(e)}")
+            self.root.after(0, self.show_preview_error, url, f"Failed to fetch {site} video info: {str(e)}")
         except Exception as e:
-            logging.error(f"Error fetching Facebook video info: {str(e)}")
-            messagebox.showerror("Error", f"Failed to fetch Facebook video info: {str(e)}")
+            logging.error(f"Error fetching {site} video info: {str(e)}")
+            self.root.after(0, self.show_preview_error, url, f"Failed to fetch {site} video info: {str(e)}")
+        finally:
+            if thumbnail_task and not thumbnail_task.done():
+                thumbnail_task.cancel()
+
+    # The show_* methods taking a url are scheduled from the background loop with
+    # root.after; a later paste may have replaced that preview in the meantime.
+    def show_title(self, url, title):
+        if url == self.preview_url:
+            self.title_label.config(text=title)
+
+    def show_preview_error(self, url, message):
+        if url == self.preview_url:
+            messagebox.showerror("Error", message)
+
+    def show_preview_thumbnail(self, url, photo):
+        if url == self.preview_url:
+            self.show_thumbnail(photo)
+
+    def show_cached_video_info(self, url):
+        cached = self.metadata_cache.get(url)
+        if not cached:
+            return False
+        events.emit('preview_cached', title=cached['title'])
+        self.title_label.config(text=cached['title'])
+        photo = self.thumbnail_cache.get(cached['thumbnail_url'])
+        if photo is not None:
+            self.show_thumbnail(photo)
+        elif cached['thumbnail_path'] and os.path.exists(cached['thumbnail_path']):
+            try:
+                with open(cached['thumbnail_path'], 'rb') as f:
+                    img = decode_thumbnail(f.read())
+                self.show_decoded_thumbnail(cached['thumbnail_url'], img)
+            except Exception as e:
+                logging.error(f"Error displaying cached thumbnail: {str(e)}")
+        return True
 
     async def fetch_video_info_async(self, url):
-        async with aiohttp.ClientSession() as session:
-            if "youtube.com" in url or "youtu.be" in url:
-                yt = YouTube(url)
-                title = yt.title
-                thumbnail_url = yt.thumbnail_url
-                logging.debug(f"Fetched YouTube video info: Title - {title}, Thumbnail - {thumbnail_url}")
-                self.title_label.config(text=title)
-                if thumbnail_url:
-                    await self.download_and_display_thumbnail_async(session, thumbnail_url)
-            elif "facebook.com" in url:
-                await self.fetch_facebook_video_info(session, url)
-
-
-    async def download_and_display_thumbnail_async(self, session, thumbnail_url):
+        session = await self.background_loop.get_session()
+        if "youtube.com" in url or "youtu.be" in url:
+            await self.fetch_extracted_video_info(session, url, 'YouTube')
+        elif "facebook.com" in url:
+            await self.fetch_extracted_video_info(session, url, 'Facebook')
+
+
+    async def download_and_display_thumbnail_async(self, session, url, thumbnail_url):
+        photo = self.thumbnail_cache.get(thumbnail_url)
+        if photo is not None:
+            self.root.after(0, self.show_preview_thumbnail, url, photo)
+            return None
         try:
-            async with session.get(thumbnail_url) as response:
-                img_data = await response.read()
-                with open('thumbnail.jpg', 'wb') as handler:
-                    handler.write(img_data)
-
-                img = Image.open('thumbnail.jpg')
-                img = img.resize((300, 250), Image.LANCZOS)
-                photo = ImageTk.PhotoImage(img)
-
-                self.thumbnail_label.config(image=photo)
-                self.thumbnail_label.image = photo
+            with self.metrics.time_phase('thumbnail'):
+                async with session.get(thumbnail_url) as response:
+                    response.raise_for_status()
+                    img_data = await response.read()
+                img = await self.background_loop.run_blocking(decode_thumbnail, img_data)
+            self.root.after(0, self.show_decoded_thumbnail, thumbnail_url, img, url)
+            return img_data
         except Exception as e:
             logging.error(f"Error downloading or displaying thumbnail: {str(e)}")
-            messagebox.showerror("Error", f"Failed to display thumbnail: {str(e)}")
-
-    async def download_and_display_thumbnail_async(self, session, thumbnail_url):
-        try:
-            async with session.get(thumbnail_url) as response:
-                img_data = await response.read()
-                with open('thumbnail.jpg', 'wb') as handler:
-                    handler.write(img_data)
+            self.root.after(0, self.show_preview_error, url, f"Failed to display thumbnail: {str(e)}")
 
-                img = Image.open('thumbnail.jpg')
-                img = img.resize((300, 250), Image.LANCZOS)
-                photo = ImageTk.PhotoImage(img)
+    def show_decoded_thumbnail(self, thumbnail_url, img, url=None):
+        from PIL import ImageTk
+        photo = ImageTk.PhotoImage(img)
+        # Cached even when superseded, so showing this video again needs no download.
+        self.thumbnail_cache.put(thumbnail_url, photo)
+        if url is None or url == self.preview_url:
+            self.show_thumbnail(photo)
 
-                self.thumbnail_label.config(image=photo)
-                self.thumbnail_label.image = photo
-        except Exception as e:
-            logging.error(f"Error downloading or displaying thumbnail: {str(e)}")
-            messagebox.showerror("Error", f"Failed to display thumbnail: {str(e)}")
+    def show_thumbnail(self, photo):
+        self.thumbnail_label.config(image=photo)
+        self.thumbnail_label.image = photo
 
     def start_spinner(self):
+        if getattr(self, 'spinner_running', False):
+            return
         self.spinner_running = True
         self.spinner_chars = itertools.cycle(['|', '/', '-', '\\'])
         self.update_spinner()
@@ -329,195 +471,106 @@ class YouTubeDownloaderApp:
             self.root.after(100, self.update_spinner)
 
     def fetch_video_info(self, url):
+        if self.fetch_task and not self.fetch_task.done():
+            # A newer paste supersedes the in-flight fetch, even when the new URL is cached.
+            self.fetch_task.cancel()
+        self.fetch_task = None
+        self.stop_spinner()
+        self.preview_url = url
+        if self.show_cached_video_info(url):
+            return
         self.start_spinner()
-        threading.Thread(target=self.run_async_fetch, args=(url,), daemon=True).start()
-
-    def run_async_fetch(self, url):
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        try:
-            loop.run_until_complete(self.fetch_video_info_async(url))
-        finally:
-            loop.close()
-        self.root.after(0, self.stop_spinner)
+        self.fetch_task = self.background_loop.submit(self.fetch_video_info_async(url))
+        self.root.after(100, self.check_fetch_task, self.fetch_task)
 
-    def check_fetch_task(self):
-        if self.fetch_task.done():
+    def check_fetch_task(self, task):
+        if task is not self.fetch_task:
+            return
+        if task.done():
             self.stop_spinner()
+            if task.cancelled():
+                return
             try:
-                self.fetch_task.result()
+                task.result()
             except Exception as e:
                 logging.error(f"Error fetching video info: {str(e)}")
                 tk.messagebox.showerror("Error", f"Failed to fetch video info: {str(e)}")
         else:
-            self.root.after(100, self.check_fetch_task)
+            self.root.after(100, self.check_fetch_task, task)
 
-    def download_content_async(self, download_type):
-        self._stop_event.clear()
-        self.cancel_button.config(state=tk.NORMAL)
-        self.show_progress_window() 
-        threading.Thread(target=self.download_content, args=(download_type,), daemon=True).start()
-        self.root.after(100, self.process_queue)
+    def get_urls(self):
+        # Anything typed into the entry takes precedence over a loaded list.
+        return self.url_entry.get().split() or self.bulk_urls
 
-    def download_content(self, download_type):
+    def download_content_async(self, download_type):
         if not self.check_ffmpeg_ffprobe():
             return
 
-        video_url = self.url_entry.get()
+        options = {
+            'format': self.format_var.get(),
+            'audio_quality': self.audio_quality_mapping[self.audio_quality_var.get()],
+            'video_quality': self.video_quality_mapping[self.video_quality_var.get()],
+            'audio_format': self.audio_format_var.get(),
+            'save_path': self.path_var.get(),
+            'parallel_fragments': self.settings_manager.parallel_fragments,
+            'stream_audio': self.settings_manager.stream_audio,
+            'priority': PRIORITY_INTERACTIVE,
+        }
+        batch = collect_video_urls(self.get_urls())
+        self.bulk_urls = []
+        self.watch_jobs(self.job_source.submit_many(batch.urls, download_type, options))
 
-        if not is_valid_video_url(video_url):
-            self.queue.put(f"error:Invalid URL. Please enter a valid YouTube or Facebook URL.")
+    def resume_unfinished_jobs(self):
+        if self.job_source is not self.download_manager:
+            # The download service resumes its own journal.
             return
+        # Leave the journal untouched until FFmpeg is configured, otherwise every
+        # resumed job would fail immediately and be recorded as an error.
+        if not (self.is_valid_executable(self.settings_manager.ffmpeg_path)
+                and self.is_valid_executable(self.settings_manager.ffprobe_path)):
+            return
+        jobs = self.download_manager.resume_unfinished()
+        if jobs:
+            self.watch_jobs(jobs)
 
-        format_choice = self.format_var.get()
-        selected_audio_quality = self.audio_quality_var.get()
-        selected_video_quality = self.video_quality_var.get()
-        selected_audio_format = self.audio_format_var.get() 
-
-        audio_quality = self.audio_quality_mapping[selected_audio_quality]
-        video_quality = self.video_quality_mapping[selected_video_quality]
-
-        try:
-            ydl_opts = {
-                'format': f'bestaudio[abr<={audio_quality}]' if download_type == 'audio' else f'bestvideo[height<={video_quality}]+bestaudio/best',
-                'outtmpl': os.path.join(self.path_var.get(), '%(title)s.%(ext)s'),
-                'ffmpeg_location': self.settings_manager.ffmpeg_path,
-                'ffprobe_location': self.settings_manager.ffprobe_path,
-                'progress_hooks': [self.ydl_hook],
-                'continuedl': True,
-                'noprogress': True,
-            }
-
-            if download_type == 'audio':
-                ydl_opts['postprocessors'] = [{
-                    'key': 'FFmpegExtractAudio',
-                    'preferredcodec': selected_audio_format,
-                    'preferredquality': audio_quality,
-                }]
-
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                ydl.download([video_url])
-
-            self.queue.put("complete") 
-
-        except DownloadError as e:
-            self.queue.put(f"error:Download error: {str(e)}")
-        except ExtractorError as e:
-            self.queue.put(f"error:Extractor error: {str(e)}")
-        except UnsupportedError as e:
-            self.queue.put(f"error:Unsupported error: {str(e)}")
-        except FileNotFoundError as e:
-            self.queue.put(f"error:FFmpeg or FFprobe was not found.")
-        except Exception as e:
-            self.queue.put(f"error:An unexpected error occurred: {str(e)}")
-
-    def ydl_hook(self, d):
-        if self._stop_event.is_set():
-            raise Exception("Download canceled by user.")
-
-        if d['status'] == 'downloading':
-            percent_str = ANSI_ESCAPE.sub('', d['_percent_str']).strip('%')
-            try:
-                percent = float(percent_str)
-                self.queue.put(percent)
-
-                elapsed_time = d.get('elapsed', 0)
-                total_bytes = d.get('total_bytes', 0)
-                downloaded_bytes = d.get('downloaded_bytes', 0)
-                download_speed = d.get('speed', 0)
-
-                logging.debug(f"Elapsed time: {elapsed_time}, Total bytes: {total_bytes}, Downloaded bytes: {downloaded_bytes}, Download speed: {download_speed}")
-
-                if download_speed and total_bytes and downloaded_bytes:
-                    remaining_bytes = total_bytes - downloaded_bytes
-                    remaining_time = remaining_bytes / download_speed
-                    self.queue.put(('speed', download_speed))
-                    self.queue.put(('remaining_time', remaining_time))
-
-                    downloaded_mb = downloaded_bytes / (1024 * 1024)
-                    total_mb = total_bytes / (1024 * 1024)
-                    self.queue.put(('size', downloaded_mb, total_mb))
+    def watch_jobs(self, jobs):
+        self.job_table.add(jobs)
+        self.show_dashboard()
 
-            except ValueError as e:
-                logging.error(f"Error converting percent to float: {percent_str} - {str(e)}")
+        self.cancel_button.config(state=tk.NORMAL)
+        if not self._progress_polling:
+            self._progress_polling = True
+            self.root.after(PROGRESS_REFRESH_MS, self.refresh_progress)
+
+    def show_dashboard(self):
+        if self.dashboard is None:
+            self.dashboard = JobDashboard(self.root, self.job_table, self.cancel_job)
+        self.dashboard.show()
+
+    def refresh_progress(self):
+        # Sampling stops after PROGRESS_FRAME_BUDGET and only on-screen rows are
+        # redrawn, so a frame costs the same with a handful of jobs or thousands.
+        changed, errors = self.job_table.update(PROGRESS_FRAME_BUDGET)
+        if errors:
+            self.display_error(errors[-1])
+        self.dashboard.refresh(changed)
+
+        if self.job_table.has_active():
+            self.root.after(PROGRESS_REFRESH_MS, self.refresh_progress)
+        else:
+            self._progress_polling = False
+            self.cancel_button.config(state=tk.DISABLED)
 
-    def update_progress(self, percent):
-        if self.progress_window:
-            self.progress_bar['value'] = percent
-            self.progress_label.config(text=f"Downloading... {percent:.2f}%")
-
-    def process_queue(self):
-        try:
-            data = self.queue.get_nowait()
-            if isinstance(data, float):
-                self.update_progress(data)
-            elif isinstance(data, tuple):
-                if data[0] == 'speed':
-                    self.update_speed(data[1])
-                elif data[0] == 'remaining_time':
-                    self.update_remaining_time(data[1])
-                elif data[0] == 'size':
-                    self.update_size(data[1], data[2])
-            elif data == "complete":
-                self.download_complete()
-            elif isinstance(data, str) and data.startswith("error"):
-                self.display_error(data.split(":")[1])
-
-        except queue.Empty:
-            pass
-
-        self.root.after(100, self.process_queue)
-
-    def update_speed(self, speed):
-        if self.progress_window:
-            speed_kbps = speed / 1024
-            self.speed_label.config(text=f"Speed: {speed_kbps:.2f} KB/s")
-
-    def update_remaining_time(self, remaining_time):
-        if self.progress_window:
-            minutes, seconds = divmod(remaining_time, 60)
-            self.remaining_time_label.config(text=f"Remaining Time: {int(minutes)}m {int(seconds)}s")
-
-    def download_complete(self):
-        if self.progress_window:
-            self.progress_bar['value'] = 100
-            self.progress_label.config(text="Download complete!")
-            self.progress_window.after(500, self.progress_window.destroy)
-
-    def show_progress_window(self):
-        self.progress_window = tk.Toplevel(self.root)
-        self.progress_window.title("Download Progress")
-        self.progress_window.geometry("300x150")
-        self.progress_label = ttk.Label(self.progress_window, text="Downloading... 0%")
-        self.progress_label.pack(pady=10)
-        self.progress_bar = ttk.Progressbar(self.progress_window, orient="horizontal", length=200, mode="determinate")
-        self.progress_bar.pack(pady=10)
-
-        speed_size_frame = ttk.Frame(self.progress_window)
-        speed_size_frame.pack(pady=5)
-
-        self.speed_label = ttk.Label(speed_size_frame, text="Speed: 0 KB/s")
-        self.speed_label.pack(side=tk.LEFT, padx=5)
-
-        self.size_label = ttk.Label(speed_size_frame, text="0 MB / 0 MB")
-        self.size_label.pack(side=tk.LEFT, padx=5)
-
-        self.remaining_time_label = ttk.Label(self.progress_window, text="Remaining Time: 0m 0s")
-        self.remaining_time_label.pack(pady=5)
-
-    def update_size(self, downloaded_mb, total_mb):
-        if self.progress_window:
-            self.size_label.config(text=f"{downloaded_mb:.2f} MB / {total_mb:.2f} MB")
+    def cancel_job(self, job_id):
+        self.job_source.cancel(job_id)
 
     def stop_download(self):
-        self._stop_event.set()
-        if self.progress_window:
-            self.progress_window.destroy()
+        self.job_source.cancel_all()
 
     def switch_language(self, lang):
         self.current_language = lang
         self.settings_manager.language = lang
-        self.settings_manager.save_settings()
+        self.settings_manager.schedule_save()
         self.update_texts()
 
     def update_texts(self):
@@ -533,15 +586,17 @@ class YouTubeDownloaderApp:
         self.browse_button.config(text=self.translations[self.current_language]['browse'])
         self.settings_button.config(text=self.translations[self.current_language]['settings'])
         self.cancel_button.config(text=self.translations[self.current_language]['cancel_download'])
+        self.downloads_button.config(text=self.translations[self.current_language]['downloads'])
         self.paste_button.config(text=self.translations[self.current_language]['paste'])
+        self.import_button.config(text=self.translations[self.current_language]['import_urls'])
         self.audio_format_label.config(text=self.translations[self.current_language]['choose audio format'])
 
     def browse_folder(self):
         folder_selected = filedialog.askdirectory()
         if folder_selected:
             self.path_var.set(folder_selected)
-            self.settings_manager.save_path = folder_selected 
-            self.settings_manager.save_settings() 
+            self.settings_manager.save_path = folder_selected
+            self.settings_manager.schedule_save()
         elif not self.path_var.get():
             default_path = str(Path.home() / "Downloads")
             self.path_var.set(default_path)
@@ -582,16 +637,56 @@ class YouTubeDownloaderApp:
                                              variable=fetch_info_var)
         fetch_info_checkbox.pack(pady=5)
 
+        concurrency_label = ttk.Label(settings_window, text=self.translations[self.current_language]['max_concurrent_downloads'])
+        concurrency_label.pack(pady=5)
+        concurrency_var = tk.IntVar(value=self.settings_manager.max_concurrent_downloads)
+        concurrency_spinbox = ttk.Spinbox(settings_window, from_=1, to=16, textvariable=concurrency_var, width=5)
+        concurrency_spinbox.pack(pady=5)
+
+        bandwidth_label = ttk.Label(settings_window, text=self.translations[self.current_language]['bandwidth_limit'])
+        bandwidth_label.pack(pady=5)
+        bandwidth_var = tk.IntVar(value=self.settings_manager.bandwidth_limit_kbps)
+        bandwidth_spinbox = ttk.Spinbox(settings_window, from_=0, to=1000000, increment=256, textvariable=bandwidth_var, width=10)
+        bandwidth_spinbox.pack(pady=5)
+
+        share_label = ttk.Label(settings_window, text=self.translations[self.current_language]['background_share'])
+        share_label.pack(pady=5)
+        share_var = tk.IntVar(value=int(self.settings_manager.background_bandwidth_share * 100))
+        share_spinbox = ttk.Spinbox(settings_window, from_=0, to=100, increment=5, textvariable=share_var, width=5)
+        share_spinbox.pack(pady=5)
+
+        rebuild_button = tk.Button(settings_window, text=self.translations[self.current_language]['rebuild_archive'],
+                                   command=self.rebuild_download_archive)
+        rebuild_button.pack(pady=5)
+
         save_button = tk.Button(settings_window, text=self.translations[self.current_language]['save'],
-                                command=lambda: self.save_settings(ffmpeg_var.get(), ffprobe_var.get(), theme_var.get(), fetch_info_var.get(), settings_window))
+                                command=lambda: self.save_settings(ffmpeg_var.get(), ffprobe_var.get(), theme_var.get(), fetch_info_var.get(), concurrency_var.get(),
+                                                                  bandwidth_var.get(), share_var.get() / 100, settings_window))
         save_button.pack(pady=10)
 
+    def rebuild_download_archive(self):
+        directory = self.path_var.get()
+        if not directory or not os.path.isdir(directory):
+            self.display_error("Please choose a valid save path first.")
+            return
+        if not self.download_manager:
+            self.display_error("The download archive is kept by the download service.")
+            return
+        manager = self.download_manager
+
+        def rebuild():
+            count = manager.archive.rebuild(directory, manager.journal)
+            self.root.after(0, lambda: self.status_label.config(text=f"Indexed {count} downloads in {directory}"))
+
+        threading.Thread(target=rebuild, daemon=True).start()
+
     def browse_executable(self, var):
         file_selected = filedialog.askopenfilename(filetypes=[("Executables", "*.exe"), ("All files", "*.*")])
         if file_selected:
             var.set(file_selected)
 
-    def save_settings(self, ffmpeg, ffprobe, theme, fetch_info_enabled, window):
+    def save_settings(self, ffmpeg, ffprobe, theme, fetch_info_enabled, max_concurrent_downloads,
+                      bandwidth_limit_kbps, background_bandwidth_share, window):
         if not self.is_valid_executable(ffmpeg):
             messagebox.showerror("Invalid Path", "The FFmpeg path is not a valid executable.")
             return
@@ -601,9 +696,17 @@ class YouTubeDownloaderApp:
         self.settings_manager.ffmpeg_path = ffmpeg
         self.settings_manager.ffprobe_path = ffprobe
         self.settings_manager.theme = theme
+        self.settings_manager.fetch_info_enabled = fetch_info_enabled
+        self.settings_manager.max_concurrent_downloads = max_concurrent_downloads
+        self.settings_manager.bandwidth_limit_kbps = bandwidth_limit_kbps
+        self.settings_manager.background_bandwidth_share = background_bandwidth_share
         self.settings_manager.save_settings()
+        if self.download_manager:
+            self.download_manager.set_max_workers(max_concurrent_downloads)
+            # Applied to running downloads immediately, no restart needed.
+            self.download_manager.bandwidth.set_rate(bandwidth_limit_kbps * 1024)
+            self.download_manager.bandwidth.set_share(PRIORITY_BACKGROUND, background_bandwidth_share)
         self.switch_theme(theme)
-        self.settings_manager.fetch_info_enabled = fetch_info_enabled
         window.destroy()
 
     def is_valid_executable(self, path):
@@ -614,9 +717,9 @@ class YouTubeDownloaderApp:
         return os.access(path, os.X_OK)
 
     def validate_inputs(self):
-        url = self.url_entry.get()
+        typed = self.url_entry.get().split()
         path = self.path_var.get()
-        if self.is_valid_input(url, path):
+        if typed and all(self.is_valid_input(url, path) for url in typed) or not typed and self.bulk_urls and path:
             self.toggle_buttons(state=tk.NORMAL)
         else:
             self.toggle_buttons(state=tk.DISABLED)
@@ -629,7 +732,7 @@ class YouTubeDownloaderApp:
         self.download_video_button.config(state=state)
 
     def is_valid_youtube_url(self, url):
-        return bool(YOUTUBE_FACEBOOK_URL_REGEX.match(url))
+        return is_valid_video_url(url)
 
     def switch_theme(self, theme_name):
         try:
@@ -660,14 +763,22 @@ class YouTubeDownloaderApp:
         self.status_label.config(text=full_message, style="Error.TLabel")
 
     def on_close(self):
-        if self._stop_event.is_set():
-            if messagebox.askokcancel("Quit", "Do you want to quit while downloading?"):
-                self.stop_download()
-                self.root.destroy()
+        if self.job_source.active_jobs():
+            # Unfinished downloads resume on the next start (or keep running in the download service).
+            if not messagebox.askokcancel("Quit", "Do you want to quit while downloading?"):
+                return
+        if self.download_manager:
+            self.download_manager.shutdown()
         else:
-            self.root.destroy()
-
-        self.settings_manager.save_settings()
+            self.job_source.close()
+        self.background_loop.close()
+        if self.download_manager:
+            self.metrics.stop_exporter()
+            if self.settings_manager.metrics_file:
+                self.metrics.dump(self.settings_manager.metrics_file)
+        self.root.destroy()
+
+        self.settings_manager.flush()
 
         if not os.path.isfile(self.settings_manager.ffmpeg_path) or not os.path.isfile(self.settings_manager.ffprobe_path):
             logging.error("FFmpeg/FFprobe not found. Please install them.")